@@ -4,26 +4,160 @@ Handles all HTTP interactions with Endee standalone service
 """
 
 import time
-import requests
-from typing import List, Dict, Any, Optional
+import gzip
+import asyncio
+import logging
+import httpx
+import msgspec
+import orjson
+from typing import List, Dict, Any, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+# Connection pool shared by concurrent search/insert calls
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_TIMEOUT = 30.0
+
+# Connection failures and transient gateway errors are retried with
+# exponential backoff (0.2s, 0.4s, 0.8s)
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.2
+RETRY_STATUSES = {502, 503, 504}
+
+# Request bodies at least this large are gzipped (a single 1536-d vector
+# is ~30KB of JSON); level 1 keeps compression cheap on the hot path
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_LEVEL = 1
+
+# Statuses a server may return when it cannot decode a gzip request body
+REJECTED_ENCODING_STATUSES = {400, 415}
+
+
+def use_http2(base_url: str) -> bool:
+    """
+    Whether to enable HTTP/2 for an Endee base URL
+    
+    httpx negotiates HTTP/2 over TLS (ALPN) only and does not upgrade
+    plain http:// connections, so HTTP/2 applies to https:// servers only;
+    http:// servers (e.g. the local default) are spoken to over HTTP/1.1.
+    """
+    return base_url.lower().startswith("https://")
+
+
+def encode_body(payload: Dict[str, Any], compress: bool) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serialize a JSON request body, gzipping it when worthwhile
+    
+    Vectors may be numpy arrays (e.g. rows of a float32 embedding matrix);
+    orjson serializes them directly without building Python float lists.
+    
+    Args:
+        payload: JSON-serializable request payload
+        compress: Whether gzip request bodies are enabled
+    
+    Returns:
+        Tuple of (body bytes, extra request headers)
+    """
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    
+    if compress and len(body) >= COMPRESS_MIN_BYTES:
+        return gzip.compress(body, compresslevel=COMPRESS_LEVEL), {"Content-Encoding": "gzip"}
+    
+    return body, {}
+
+
+def decode_response(response: httpx.Response) -> Dict[str, Any]:
+    """
+    Raise on HTTP errors, then parse the JSON body with orjson
+    
+    Args:
+        response: HTTP response from Endee
+    
+    Returns:
+        Parsed response body
+    """
+    response.raise_for_status()
+    return orjson.loads(response.content)
 
 
 class EndeeClient:
     """Client for interacting with Endee vector database via REST API"""
     
-    def __init__(self, base_url: str = "http://localhost:8080"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8080",
+        compress: bool = True,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS
+    ):
         """
         Initialize Endee REST API client
         
         Args:
             base_url: Endee server URL (default: http://localhost:8080)
+            compress: Gzip large request bodies (disabled automatically
+                if the server rejects them)
+            max_connections: Connection pool size (match to worker concurrency)
         """
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json'
-        })
+        self.compress = compress
+        self.client = httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=use_http2(self.base_url),
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections
+                ),
+                retries=MAX_RETRIES
+            ),
+            timeout=DEFAULT_TIMEOUT,
+            headers={'Content-Type': 'application/json'}
+        )
+        
+    def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying transient 502/503/504 responses
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Passed through to httpx
+        
+        Returns:
+            HTTP response
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            response = self.client.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            time.sleep(RETRY_BACKOFF * (2 ** attempt))
+    
+    def _post_json(self, url: str, payload: Dict[str, Any]) -> httpx.Response:
+        """
+        POST a JSON payload, falling back to an uncompressed body if the
+        server rejects gzip
+        
+        Args:
+            url: Request URL
+            payload: JSON-serializable request payload
+        
+        Returns:
+            HTTP response
+        """
+        body, headers = encode_body(payload, self.compress)
+        response = self._request("POST", url, content=body, headers=headers)
         
+        if headers and response.status_code in REJECTED_ENCODING_STATUSES:
+            body, _ = encode_body(payload, compress=False)
+            retry = self._request("POST", url, content=body)
+            if retry.status_code < 400:
+                logger.warning("⚠ Endee rejected gzip request bodies; sending uncompressed JSON")
+                self.compress = False
+            return retry
+        
+        return response
+    
     def create_index(
         self,
         index_name: str,
@@ -49,19 +183,19 @@ class EndeeClient:
         }
         
         try:
-            response = self.session.post(url, json=payload)
+            response = self._post_json(url, payload)
             
             # Index might already exist (409 conflict)
             if response.status_code == 409:
-                print(f"✓ Index '{index_name}' already exists")
+                logger.info("✓ Index '%s' already exists", index_name)
                 return {"status": "exists", "index_name": index_name}
             
-            response.raise_for_status()
-            print(f"✓ Created index '{index_name}' (dimension={dimension}, metric={metric})")
-            return response.json()
+            result = decode_response(response)
+            logger.info("✓ Created index '%s' (dimension=%s, metric=%s)", index_name, dimension, metric)
+            return result
             
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Error creating index: {str(e)}")
+        except httpx.HTTPError as e:
+            logger.error("✗ Error creating index: %s", e)
             raise
     
     def insert_documents(
@@ -86,22 +220,21 @@ class EndeeClient:
         """
         url = f"{self.base_url}/indexes/{index_name}/vectors"
         
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
         try:
-            response = self.session.post(url, json={"vectors": vectors})
-            response.raise_for_status()
+            response = self._post_json(url, {"vectors": vectors})
             
-            elapsed_ms = (time.time() - start_time) * 1000
+            elapsed_ms = (time.perf_counter_ns() - start_time) / 1_000_000
             
-            result = response.json()
-            result['elapsed_ms'] = round(elapsed_ms, 2)
+            result = decode_response(response)
+            result['elapsed_ms'] = elapsed_ms
             
-            print(f"✓ Inserted {len(vectors)} vectors into '{index_name}' ({elapsed_ms:.2f}ms)")
+            logger.info("✓ Inserted %s vectors into '%s' (%.2fms)", len(vectors), index_name, elapsed_ms)
             return result
             
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Error inserting vectors: {str(e)}")
+        except httpx.HTTPError as e:
+            logger.error("✗ Error inserting vectors: %s", e)
             raise
     
     def search(
@@ -109,7 +242,8 @@ class EndeeClient:
         index_name: str,
         query_vector: List[float],
         top_k: int = 5,
-        include_metadata: bool = True
+        include_metadata: bool = True,
+        response_type: Optional[type] = None
     ) -> Dict[str, Any]:
         """
         Perform vector similarity search in Endee
@@ -119,11 +253,13 @@ class EndeeClient:
             query_vector: Query embedding vector
             top_k: Number of results to return
             include_metadata: Whether to include metadata in results
+            response_type: Optional msgspec Struct type with a ``results``
+                field; the body is decoded straight into it
         
         Returns:
             Dict with search results and retrieval latency:
             {
-                "results": List[Dict],
+                "results": List[Dict] (or response_type's results),
                 "retrieval_latency_ms": float
             }
         """
@@ -135,24 +271,27 @@ class EndeeClient:
         }
         
         # Measure retrieval latency (critical performance metric)
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
         try:
-            response = self.session.post(url, json=payload)
-            response.raise_for_status()
+            response = self._post_json(url, payload)
             
             # Calculate Endee retrieval latency
-            retrieval_latency_ms = (time.time() - start_time) * 1000
+            retrieval_latency_ms = (time.perf_counter_ns() - start_time) / 1_000_000
             
-            result = response.json()
+            if response_type is None:
+                results = decode_response(response).get("results", [])
+            else:
+                response.raise_for_status()
+                results = msgspec.json.decode(response.content, type=response_type).results
             
             return {
-                "results": result.get("results", []),
-                "retrieval_latency_ms": round(retrieval_latency_ms, 2)
+                "results": results,
+                "retrieval_latency_ms": retrieval_latency_ms
             }
             
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Error searching vectors: {str(e)}")
+        except httpx.HTTPError as e:
+            logger.error("✗ Error searching vectors: %s", e)
             raise
     
     def delete_index(self, index_name: str) -> Dict[str, Any]:
@@ -168,13 +307,13 @@ class EndeeClient:
         url = f"{self.base_url}/indexes/{index_name}"
         
         try:
-            response = self.session.delete(url)
-            response.raise_for_status()
-            print(f"✓ Deleted index '{index_name}'")
-            return response.json()
+            response = self._request("DELETE", url)
+            result = decode_response(response)
+            logger.info("✓ Deleted index '%s'", index_name)
+            return result
             
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Error deleting index: {str(e)}")
+        except httpx.HTTPError as e:
+            logger.error("✗ Error deleting index: %s", e)
             raise
     
     def get_index_info(self, index_name: str) -> Dict[str, Any]:
@@ -190,12 +329,11 @@ class EndeeClient:
         url = f"{self.base_url}/indexes/{index_name}"
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
+            response = self._request("GET", url)
+            return decode_response(response)
             
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Error getting index info: {str(e)}")
+        except httpx.HTTPError as e:
+            logger.error("✗ Error getting index info: %s", e)
             raise
     
     def health_check(self) -> bool:
@@ -208,7 +346,316 @@ class EndeeClient:
         url = f"{self.base_url}/health"
         
         try:
-            response = self.session.get(url, timeout=5)
+            response = self.client.get(url, timeout=5)
             return response.status_code == 200
-        except:
+        except httpx.HTTPError:
             return False
+    
+    def close(self) -> None:
+        """Close pooled connections"""
+        self.client.close()
+
+
+class EndeeAsyncClient:
+    """Async client for Endee, for use from FastAPI endpoints without blocking the event loop"""
+    
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8080",
+        compress: bool = True,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS
+    ):
+        """
+        Initialize async Endee REST API client
+        
+        Args:
+            base_url: Endee server URL (default: http://localhost:8080)
+            compress: Gzip large request bodies (disabled automatically
+                if the server rejects them)
+            max_connections: Connection pool size (match to worker concurrency)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.compress = compress
+        self.client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                http2=use_http2(self.base_url),
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections
+                ),
+                retries=MAX_RETRIES
+            ),
+            timeout=DEFAULT_TIMEOUT,
+            headers={'Content-Type': 'application/json'}
+        )
+        
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying transient 502/503/504 responses
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Passed through to httpx
+        
+        Returns:
+            HTTP response
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            response = await self.client.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+    
+    async def _post_json(self, url: str, payload: Dict[str, Any]) -> httpx.Response:
+        """
+        POST a JSON payload, falling back to an uncompressed body if the
+        server rejects gzip
+        
+        Args:
+            url: Request URL
+            payload: JSON-serializable request payload
+        
+        Returns:
+            HTTP response
+        """
+        body, headers = encode_body(payload, self.compress)
+        response = await self._request("POST", url, content=body, headers=headers)
+        
+        if headers and response.status_code in REJECTED_ENCODING_STATUSES:
+            body, _ = encode_body(payload, compress=False)
+            retry = await self._request("POST", url, content=body)
+            if retry.status_code < 400:
+                logger.warning("⚠ Endee rejected gzip request bodies; sending uncompressed JSON")
+                self.compress = False
+            return retry
+        
+        return response
+    
+    async def create_index(
+        self,
+        index_name: str,
+        dimension: int,
+        metric: str = "cosine"
+    ) -> Dict[str, Any]:
+        """
+        Create a new vector index in Endee
+        
+        Args:
+            index_name: Name of the index
+            dimension: Vector dimension (must match embedding size)
+            metric: Distance metric (cosine, euclidean, or dot)
+        
+        Returns:
+            Response from Endee API
+        """
+        url = f"{self.base_url}/indexes"
+        payload = {
+            "name": index_name,
+            "dimension": dimension,
+            "metric": metric
+        }
+        
+        try:
+            response = await self._post_json(url, payload)
+            
+            # Index might already exist (409 conflict)
+            if response.status_code == 409:
+                logger.info("✓ Index '%s' already exists", index_name)
+                return {"status": "exists", "index_name": index_name}
+            
+            result = decode_response(response)
+            logger.info("✓ Created index '%s' (dimension=%s, metric=%s)", index_name, dimension, metric)
+            return result
+            
+        except httpx.HTTPError as e:
+            logger.error("✗ Error creating index: %s", e)
+            raise
+    
+    async def insert_documents(
+        self,
+        index_name: str,
+        vectors: List[Dict[str, Any]],
+        batch_size: int = 64,
+        concurrency: int = 8
+    ) -> Dict[str, Any]:
+        """
+        Insert/upsert vectors into Endee index
+        
+        Vectors are split into batches of batch_size and uploaded
+        concurrently, with at most concurrency requests in flight.
+        
+        Args:
+            index_name: Target index name
+            vectors: List of vector objects with structure:
+                {
+                    "id": str,
+                    "vector": List[float] or 1-D numpy array,
+                    "metadata": Dict (optional)
+                }
+            batch_size: Vectors per upsert request
+            concurrency: Maximum upsert requests in flight
+        
+        Returns:
+            Dict with insertion statistics and latency:
+            {
+                "count": int,
+                "batches": int,
+                "elapsed_ms": float,
+                "max_batch_ms": float
+            }
+        """
+        url = f"{self.base_url}/indexes/{index_name}/vectors"
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def insert_batch(batch: List[Dict[str, Any]]) -> Tuple[int, float]:
+            async with semaphore:
+                batch_start = time.perf_counter_ns()
+                response = await self._post_json(url, {"vectors": batch})
+                batch_ms = (time.perf_counter_ns() - batch_start) / 1_000_000
+                return decode_response(response).get("count", len(batch)), batch_ms
+        
+        start_time = time.perf_counter_ns()
+        
+        try:
+            results = await asyncio.gather(*(
+                insert_batch(vectors[i:i + batch_size])
+                for i in range(0, len(vectors), batch_size)
+            ))
+            
+            elapsed_ms = (time.perf_counter_ns() - start_time) / 1_000_000
+            
+            result = {
+                "count": sum(count for count, _ in results),
+                "batches": len(results),
+                "elapsed_ms": elapsed_ms,
+                "max_batch_ms": max((ms for _, ms in results), default=0.0)
+            }
+            
+            logger.info(
+                "✓ Inserted %s vectors into '%s' in %s batches (%.2fms)",
+                result['count'], index_name, result['batches'], elapsed_ms
+            )
+            return result
+            
+        except httpx.HTTPError as e:
+            logger.error("✗ Error inserting vectors: %s", e)
+            raise
+    
+    async def search(
+        self,
+        index_name: str,
+        query_vector: List[float],
+        top_k: int = 5,
+        include_metadata: bool = True,
+        response_type: Optional[type] = None
+    ) -> Dict[str, Any]:
+        """
+        Perform vector similarity search in Endee
+        
+        Args:
+            index_name: Index to search
+            query_vector: Query embedding vector
+            top_k: Number of results to return
+            include_metadata: Whether to include metadata in results
+            response_type: Optional msgspec Struct type with a ``results``
+                field; the body is decoded straight into it
+        
+        Returns:
+            Dict with search results and retrieval latency:
+            {
+                "results": List[Dict] (or response_type's results),
+                "retrieval_latency_ms": float
+            }
+        """
+        url = f"{self.base_url}/indexes/{index_name}/search"
+        payload = {
+            "vector": query_vector,
+            "top_k": top_k,
+            "include_metadata": include_metadata
+        }
+        
+        # Measure retrieval latency (critical performance metric)
+        start_time = time.perf_counter_ns()
+        
+        try:
+            response = await self._post_json(url, payload)
+            
+            # Calculate Endee retrieval latency
+            retrieval_latency_ms = (time.perf_counter_ns() - start_time) / 1_000_000
+            
+            if response_type is None:
+                results = decode_response(response).get("results", [])
+            else:
+                response.raise_for_status()
+                results = msgspec.json.decode(response.content, type=response_type).results
+            
+            return {
+                "results": results,
+                "retrieval_latency_ms": retrieval_latency_ms
+            }
+            
+        except httpx.HTTPError as e:
+            logger.error("✗ Error searching vectors: %s", e)
+            raise
+    
+    async def delete_index(self, index_name: str) -> Dict[str, Any]:
+        """
+        Delete an index from Endee
+        
+        Args:
+            index_name: Name of index to delete
+        
+        Returns:
+            Response from Endee API
+        """
+        url = f"{self.base_url}/indexes/{index_name}"
+        
+        try:
+            response = await self._request("DELETE", url)
+            result = decode_response(response)
+            logger.info("✓ Deleted index '%s'", index_name)
+            return result
+            
+        except httpx.HTTPError as e:
+            logger.error("✗ Error deleting index: %s", e)
+            raise
+    
+    async def get_index_info(self, index_name: str) -> Dict[str, Any]:
+        """
+        Get information about an index
+        
+        Args:
+            index_name: Name of index
+        
+        Returns:
+            Index information
+        """
+        url = f"{self.base_url}/indexes/{index_name}"
+        
+        try:
+            response = await self._request("GET", url)
+            return decode_response(response)
+            
+        except httpx.HTTPError as e:
+            logger.error("✗ Error getting index info: %s", e)
+            raise
+    
+    async def health_check(self) -> bool:
+        """
+        Check if Endee service is healthy
+        
+        Returns:
+            True if service is healthy, False otherwise
+        """
+        url = f"{self.base_url}/health"
+        
+        try:
+            response = await self.client.get(url, timeout=5)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+    
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        await self.client.aclose()
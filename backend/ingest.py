@@ -3,13 +3,85 @@ Document Ingestion Pipeline
 Handles document loading, chunking, embedding, and storage in Endee
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Iterable, AsyncIterator, Optional, Set
 import os
-from openai import OpenAI
-from utils.pdf_loader import load_pdf
-from utils.docx_loader import load_docx
-from utils.chunker import chunk_documents
-from endee_client import EndeeClient
+import sys
+import json
+import hashlib
+import logging
+import asyncio
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from functools import partial
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import tiktoken
+from openai import AsyncOpenAI, RateLimitError
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential
+)
+from utils.file_io import FileSource, as_stream
+from utils.pdf_loader import load_and_chunk_pdf
+from utils.docx_loader import load_and_chunk_docx
+from endee_client import EndeeAsyncClient
+
+
+logger = logging.getLogger(__name__)
+
+# OpenAI embeddings API limits
+MAX_TOKENS_PER_INPUT = 8191
+MAX_TOKENS_PER_REQUEST = 300_000
+
+# OpenAI Batch API limits and lifecycle
+MAX_REQUESTS_PER_BATCH = 50_000
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Loader workers are started from a clean forkserver process rather than
+# forked from the app, which runs the event loop and logging/HTTP threads
+# (Windows only supports spawn)
+LOAD_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def load_and_chunk_document(
+    file_content: FileSource,
+    filename: str,
+    window_size: int,
+    stride: int,
+    mode: str = "chars"
+) -> List[Dict[str, Any]]:
+    """
+    Load and chunk a document in one worker call, based on file extension
+    
+    Module-level so it can be dispatched to worker processes; only the
+    chunks travel back to the parent, never the page/paragraph list.
+    The chunks are collected into a list here, since they are pickled
+    back as one result.
+    
+    Args:
+        file_content: File content as bytes or a binary file object
+        filename: Original filename
+        window_size: Maximum characters per chunk
+        stride: Characters between consecutive chunk starts
+        mode: "chars" or "sentences"
+    
+    Returns:
+        Chunks with text and location metadata
+    """
+    file_ext = filename.lower().split('.')[-1]
+    
+    if file_ext == 'pdf':
+        chunks = load_and_chunk_pdf(file_content, filename, window_size, stride, mode)
+    elif file_ext in ['docx', 'doc']:
+        chunks = list(load_and_chunk_docx(file_content, filename, window_size, stride, mode))
+    else:
+        raise ValueError(f"Unsupported file type: {file_ext}")
+    
+    return chunks
 
 
 class IngestionPipeline:
@@ -17,143 +89,539 @@ class IngestionPipeline:
     
     def __init__(
         self,
-        openai_api_key: str,
-        endee_client: EndeeClient,
+        openai_client: AsyncOpenAI,
+        endee_client: EndeeAsyncClient,
         index_name: str,
         embedding_model: str = "text-embedding-3-small",
         chunk_size: int = 500,
-        chunk_overlap: int = 50
+        chunk_overlap: int = 50,
+        chunk_mode: str = "chars",
+        max_batch_inputs: int = 256,
+        max_batch_tokens: int = 40_000,
+        embedding_concurrency: int = 8,
+        upsert_batch_size: int = 64,
+        upsert_concurrency: int = 8,
+        batch_threshold: Optional[int] = None,
+        batch_poll_interval: float = 30.0,
+        load_workers: Optional[int] = None,
+        min_chunk_tokens: int = 8,
+        chunk_batch_size: int = 16_384,
+        chunk_cache_bytes: int = 64 * 1024 * 1024,
+        openai_semaphore: Optional[asyncio.Semaphore] = None
     ):
         """
         Initialize ingestion pipeline
         
         Args:
-            openai_api_key: OpenAI API key
-            endee_client: Initialized Endee REST API client
+            openai_client: Shared async OpenAI client
+            endee_client: Initialized async Endee REST API client
             index_name: Name of Endee index to use
             embedding_model: OpenAI embedding model name
             chunk_size: Maximum characters per chunk
             chunk_overlap: Overlapping characters between chunks
+            chunk_mode: "chars" for fixed character windows or "sentences"
+                to pack whole sentences
+            max_batch_inputs: Maximum texts per embeddings request
+            max_batch_tokens: Maximum tokens per embeddings request
+                (capped at the 300k-token API limit)
+            embedding_concurrency: Maximum embeddings requests in flight
+                per call, so one ingest cannot take all of openai_semaphore
+            upsert_batch_size: Vectors per Endee upsert request
+            upsert_concurrency: Maximum Endee upsert requests in flight
+            batch_threshold: Chunk count above which an embed round goes
+                through the OpenAI Batch API instead of real-time requests
+                (None or 0, the default, never uses it). Rounds are per
+                file (at most chunk_batch_size chunks), so many small files
+                never reach it; ingest_documents waits for the batch to
+                finish (up to its 24h window)
+            batch_poll_interval: Seconds between Batch API status checks
+            load_workers: Worker processes for parsing documents
+                (default: CPU count)
+            min_chunk_tokens: Chunks with fewer tokens are not embedded
+            chunk_batch_size: Chunks pulled from the chunker per
+                embed/store round (keep above batch_threshold so large
+                files still reach the Batch API)
+            chunk_cache_bytes: Memory budget for keeping the chunks of
+                recently loaded files, so re-uploading an identical file
+                skips parsing and chunking (0 disables)
+            openai_semaphore: Shared limit on in-flight OpenAI requests
         """
-        self.openai_client = OpenAI()
+        self.openai_client = openai_client
         self.endee_client = endee_client
         self.index_name = index_name
         self.embedding_model = embedding_model
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.chunk_mode = chunk_mode
+        self.max_batch_inputs = max_batch_inputs
+        self.max_batch_tokens = min(max_batch_tokens, MAX_TOKENS_PER_REQUEST)
+        self.embedding_concurrency = embedding_concurrency
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_concurrency = upsert_concurrency
+        self.batch_threshold = batch_threshold
+        self.batch_poll_interval = batch_poll_interval
+        self.load_workers = load_workers or os.cpu_count() or 1
+        self.min_chunk_tokens = min_chunk_tokens
+        self.chunk_batch_size = chunk_batch_size
+        self.chunk_cache_bytes = chunk_cache_bytes
+        self.openai_semaphore = openai_semaphore or asyncio.Semaphore(16)
+        
+        # Chunks of recently loaded files, keyed by (upload digest, filename,
+        # chunking parameters), evicted oldest-first past chunk_cache_bytes
+        self._chunk_cache: "OrderedDict[Tuple, Tuple[List[Dict[str, Any]], int]]" = OrderedDict()
+        self._chunk_cache_size = 0
+        
+        # Created on first ingest (see the load_pool property)
+        self._load_pool: Optional[ProcessPoolExecutor] = None
+        
+        # Loaded on first ingest (see the tokenizer property), so a missing
+        # BPE file never blocks application start-up
+        self._tokenizer: Optional[tiktoken.Encoding] = None
+        self._tokenizer_loaded = False
+        self._tokenizer_lock = threading.Lock()
+    
+    @property
+    def tokenizer(self) -> Optional[tiktoken.Encoding]:
+        """
+        Tokenizer for the embedding model, loaded on first use
+        
+        tiktoken downloads its BPE file on first load unless it is already
+        cached (pre-populate TIKTOKEN_CACHE_DIR for offline hosts), so it
+        is first used from a worker thread (see ingest_documents). If the
+        load fails, ingest continues with estimated token counts.
+        """
+        if not self._tokenizer_loaded:
+            with self._tokenizer_lock:
+                if not self._tokenizer_loaded:
+                    try:
+                        try:
+                            self._tokenizer = tiktoken.encoding_for_model(self.embedding_model)
+                        except KeyError:
+                            self._tokenizer = tiktoken.get_encoding("cl100k_base")
+                    except Exception as e:
+                        logger.warning("⚠ Could not load tiktoken encoding, estimating token counts: %s", e)
+                    self._tokenizer_loaded = True
+        return self._tokenizer
+    
+    @property
+    def load_pool(self) -> ProcessPoolExecutor:
+        """
+        Worker pool for parsing documents, created on first use
+        
+        Parsing is CPU-bound; workers are kept alive across requests. Each
+        worker imports the app's __main__ as a spawned process would, so it
+        sets up its own logging, and building the pool lazily keeps those
+        imports from creating pools of their own. The forkserver itself only
+        preloads this module, leaving it no threads to fork workers from.
+        """
+        if self._load_pool is None:
+            mp_context = multiprocessing.get_context(LOAD_START_METHOD)
+            if LOAD_START_METHOD == "forkserver":
+                mp_context.set_forkserver_preload([__name__])
+            self._load_pool = ProcessPoolExecutor(
+                max_workers=self.load_workers,
+                mp_context=mp_context
+            )
+        return self._load_pool
     
-    def load_document(self, file_content: bytes, filename: str) -> List[Dict[str, Any]]:
+    def _encode(self, texts: List[str]) -> List[Any]:
         """
-        Load document based on file extension
+        Tokenize texts for counting and truncation
+        
+        Without a tokenizer, UTF-8 bytes stand in for tokens: every token
+        is at least one byte, so limits enforced on bytes always hold.
+        """
+        if self.tokenizer is None:
+            return [text.encode("utf-8") for text in texts]
+        return self.tokenizer.encode_ordinary_batch(texts)
+    
+    def _decode(self, tokens: Any) -> str:
+        """Inverse of _encode for a single (possibly truncated) text"""
+        if self.tokenizer is None:
+            return tokens.decode("utf-8", errors="ignore")
+        return self.tokenizer.decode(tokens)
+    
+    async def _load_documents(
+        self,
+        files: Iterable[Tuple[FileSource, str]]
+    ) -> AsyncIterator[Tuple[str, "asyncio.Future[List[Dict[str, Any]]]"]]:
+        """
+        Parse and chunk files in the worker pool, keeping up to load_workers
+        files in flight
+        
+        Files whose chunks are still cached from an earlier upload of the
+        same bytes are not sent to the pool at all.
         
         Args:
-            file_content: File content as bytes
-            filename: Original filename
+            files: Iterable of (file_content, filename) tuples
+        
+        Yields:
+            (filename, future of the file's chunks), in input order
+        """
+        loop = asyncio.get_running_loop()
+        pending = deque()
+        
+        for file_content, filename in files:
+            file_content, digest = await asyncio.to_thread(self._read_upload, file_content)
+            
+            cached = None
+            if digest is not None:
+                key = (
+                    digest,
+                    filename,
+                    self.chunk_size,
+                    self.chunk_overlap,
+                    self.chunk_mode
+                )
+                cached = self._chunk_cache.get(key)
+            
+            if cached is not None:
+                self._chunk_cache.move_to_end(key)
+                future = loop.create_future()
+                future.set_result(cached[0])
+            else:
+                future = loop.run_in_executor(
+                    self.load_pool,
+                    load_and_chunk_document,
+                    file_content,
+                    filename,
+                    self.chunk_size,
+                    self.chunk_size - self.chunk_overlap,
+                    self.chunk_mode
+                )
+                if self.chunk_cache_bytes:
+                    future.add_done_callback(partial(self._cache_chunks, key))
+            pending.append((filename, future))
+            
+            if len(pending) >= self.load_workers:
+                yield pending.popleft()
+        
+        while pending:
+            yield pending.popleft()
+    
+    def _read_upload(self, file_content: FileSource) -> Tuple[bytes, Optional[bytes]]:
+        """
+        Read an upload into bytes and digest it for the chunk cache
+        
+        Called in a thread, so a large upload's read and hash don't hold up
+        the event loop.
         
         Returns:
-            List of document sections with metadata
+            Tuple of (file bytes, digest or None when the cache is disabled)
         """
-        file_ext = filename.lower().split('.')[-1]
+        # Worker processes need picklable bytes, not open file objects
+        if not isinstance(file_content, (bytes, bytearray)):
+            file_content = as_stream(file_content).read()
         
-        if file_ext == 'pdf':
-            return load_pdf(file_content, filename)
-        elif file_ext in ['docx', 'doc']:
-            return load_docx(file_content, filename)
-        else:
-            raise ValueError(f"Unsupported file type: {file_ext}")
+        if not self.chunk_cache_bytes:
+            return file_content, None
+        return file_content, hashlib.blake2b(file_content, digest_size=32).digest()
     
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def _cache_chunks(self, key: Tuple, future: "asyncio.Future[List[Dict[str, Any]]]") -> None:
+        """Keep a loaded file's chunks within chunk_cache_bytes (future done callback)"""
+        if future.cancelled() or future.exception() is not None or key in self._chunk_cache:
+            return
+        
+        chunks = future.result()
+        size = sum(sys.getsizeof(chunk) + sys.getsizeof(chunk["text"]) for chunk in chunks)
+        if size > self.chunk_cache_bytes:
+            return
+        
+        self._chunk_cache[key] = (chunks, size)
+        self._chunk_cache_size += size
+        while self._chunk_cache_size > self.chunk_cache_bytes:
+            _, (_, evicted_size) = self._chunk_cache.popitem(last=False)
+            self._chunk_cache_size -= evicted_size
+    
+    def close(self) -> None:
+        """Shut down the document loading worker pool, if it was started"""
+        if self._load_pool is not None:
+            self._load_pool.shutdown(wait=False, cancel_futures=True)
+    
+    def filter_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        seen: Set[bytes]
+    ) -> Tuple[List[Dict[str, Any]], List[int], List[int]]:
         """
-        Generate embeddings using OpenAI
+        Drop short and duplicate chunks and truncate over-long ones before embedding
+        
+        Args:
+            chunks: Chunks to filter
+            seen: Digests of chunk texts already kept in this ingest
+                (updated in place)
+        
+        Returns:
+            Tuple of (kept chunks, token count of each kept chunk, position
+            of each kept chunk in chunks)
+        """
+        token_lists = self._encode([chunk["text"] for chunk in chunks])
+        
+        kept = []
+        token_counts = []
+        positions = []
+        for position, (chunk, tokens) in enumerate(zip(chunks, token_lists)):
+            if len(tokens) < self.min_chunk_tokens:
+                continue
+            
+            digest = hashlib.blake2b(chunk["text"].encode("utf-8"), digest_size=16).digest()
+            if digest in seen:
+                continue
+            seen.add(digest)
+            
+            # Inputs over the per-input limit are rejected by the API
+            if len(tokens) > MAX_TOKENS_PER_INPUT:
+                tokens = tokens[:MAX_TOKENS_PER_INPUT]
+                chunk = {**chunk, "text": self._decode(tokens)}
+            
+            kept.append(chunk)
+            token_counts.append(len(tokens))
+            positions.append(position)
+        
+        return kept, token_counts, positions
+    
+    def _batch_texts(
+        self,
+        texts: List[str],
+        token_counts: Optional[List[int]] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Partition texts into sub-batches bounded by input and token counts
         
         Args:
             texts: List of text strings to embed
+            token_counts: Precomputed token count per text (tokenized here if omitted)
         
         Returns:
-            List of embedding vectors
+            List of (start, end) slice bounds into texts, in order
+        """
+        if token_counts is None:
+            token_counts = [
+                min(len(tokens), MAX_TOKENS_PER_INPUT)
+                for tokens in self._encode(texts)
+            ]
+        
+        batches = []
+        start = 0
+        batch_tokens = 0
+        
+        for idx, n_tokens in enumerate(token_counts):
+            batch_full = (
+                idx - start >= self.max_batch_inputs
+                or batch_tokens + n_tokens > self.max_batch_tokens
+            )
+            if idx > start and batch_full:
+                batches.append((start, idx))
+                start = idx
+                batch_tokens = 0
+            batch_tokens += n_tokens
+        
+        if start < len(texts):
+            batches.append((start, len(texts)))
+        
+        return batches
+    
+    @retry(
+        retry=retry_if_exception_type(RateLimitError),
+        wait=wait_random_exponential(min=1, max=60),
+        stop=stop_after_attempt(6),
+        reraise=True
+    )
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
         """
-        print(f"→ Generating embeddings for {len(texts)} chunks using {self.embedding_model}...")
+        Embed a single sub-batch, backing off exponentially on rate limits
         
-        # OpenAI API call for embeddings
-        response = self.openai_client.embeddings.create(
+        Args:
+            texts: Texts within the per-request input and token limits
+        
+        Returns:
+            List of embedding vectors in input order
+        """
+        response = await self.openai_client.embeddings.create(
             model=self.embedding_model,
             input=texts
         )
         
-        embeddings = [item.embedding for item in response.data]
-        print(f"✓ Generated {len(embeddings)} embeddings")
+        return [item.embedding for item in response.data]
+    
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        token_counts: Optional[List[int]] = None
+    ) -> List[List[float]]:
+        """
+        Generate embeddings using OpenAI
+        
+        Texts are split into token-bounded sub-batches which are embedded
+        concurrently (at most embedding_concurrency requests in flight,
+        each also holding the shared openai_semaphore).
+        
+        Args:
+            texts: List of text strings to embed
+            token_counts: Precomputed token count per text (optional)
+        
+        Returns:
+            List of embedding vectors
+        """
+        batches = self._batch_texts(texts, token_counts)
+        logger.info(
+            "→ Generating embeddings for %s chunks using %s (%s requests)...",
+            len(texts), self.embedding_model, len(batches)
+        )
+        
+        semaphore = asyncio.Semaphore(self.embedding_concurrency)
+        
+        async def embed(start: int, end: int) -> List[List[float]]:
+            async with semaphore, self.openai_semaphore:
+                return await self._embed_batch(texts[start:end])
+        
+        # gather preserves batch order, so results reassemble by index
+        results = await asyncio.gather(*(embed(start, end) for start, end in batches))
+        embeddings = [embedding for batch in results for embedding in batch]
+        logger.info("✓ Generated %s embeddings", len(embeddings))
         
         return embeddings
     
-    def ingest_documents(
-        self,
-        files: List[tuple]  # List of (file_content: bytes, filename: str)
-    ) -> Dict[str, Any]:
+    async def _run_embedding_batch(self, texts: List[str], offset: int) -> List[List[float]]:
         """
-        Complete ingestion pipeline: load, chunk, embed, and store
+        Submit one Batch API job and wait for its embeddings
         
         Args:
-            files: List of tuples (file_content, filename)
+            texts: Texts to embed (at most MAX_REQUESTS_PER_BATCH)
+            offset: Index of texts[0] in the full input, used as custom_id base
         
         Returns:
-            Ingestion statistics
+            List of embedding vectors in input order
         """
-        print(f"\n{'='*60}")
-        print(f"STARTING DOCUMENT INGESTION")
-        print(f"{'='*60}\n")
+        payload = "\n".join(
+            json.dumps({
+                "custom_id": str(offset + idx),
+                "method": "POST",
+                "url": "/v1/embeddings",
+                "body": {"model": self.embedding_model, "input": [text]}
+            })
+            for idx, text in enumerate(texts)
+        ).encode("utf-8")
         
-        all_documents = []
+        input_file = await self.openai_client.files.create(
+            file=("embeddings.jsonl", payload),
+            purpose="batch"
+        )
+        batch = await self.openai_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/embeddings",
+            completion_window="24h"
+        )
+        logger.info("→ Submitted embedding batch %s (%s requests)", batch.id, len(texts))
         
-        # Step 1: Load all documents
-        print("STEP 1: Loading documents...")
-        for file_content, filename in files:
-            try:
-                docs = self.load_document(file_content, filename)
-                all_documents.extend(docs)
-            except Exception as e:
-                print(f"✗ Failed to load {filename}: {str(e)}")
+        while batch.status not in BATCH_TERMINAL_STATUSES:
+            await asyncio.sleep(self.batch_poll_interval)
+            batch = await self.openai_client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Embedding batch {batch.id} ended with status '{batch.status}'")
+        
+        output = await self.openai_client.files.content(batch.output_file_id)
+        
+        # Output lines are not guaranteed to be in input order
+        embeddings: List[Any] = [None] * len(texts)
+        for line in output.text.splitlines():
+            if not line.strip():
                 continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                raise RuntimeError(
+                    f"Embedding request {record.get('custom_id')} failed: "
+                    f"{record.get('error') or response.get('body')}"
+                )
+            embeddings[int(record["custom_id"]) - offset] = response["body"]["data"][0]["embedding"]
         
-        if not all_documents:
-            return {
-                "success": False,
-                "error": "No documents were successfully loaded",
-                "chunks_created": 0,
-                "vectors_stored": 0
-            }
+        missing = sum(1 for embedding in embeddings if embedding is None)
+        if missing:
+            raise RuntimeError(f"Embedding batch {batch.id} is missing {missing} results")
         
-        print(f"\n✓ Loaded {len(all_documents)} document sections from {len(files)} files\n")
+        return embeddings
+    
+    async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings using the OpenAI Batch API
         
-        # Step 2: Chunk documents
-        print("STEP 2: Chunking documents...")
-        chunks = chunk_documents(
-            all_documents,
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap
-        )
+        Cheaper than real-time requests and drawn from a separate rate-limit
+        pool, but completion can take up to the 24h batch window.
         
-        if not chunks:
-            return {
-                "success": False,
-                "error": "No chunks were created",
-                "chunks_created": 0,
-                "vectors_stored": 0
-            }
+        Args:
+            texts: List of text strings to embed
+        
+        Returns:
+            List of embedding vectors
+        """
+        logger.info("→ Generating embeddings for %s chunks via Batch API using %s...", len(texts), self.embedding_model)
+        
+        results = await asyncio.gather(*(
+            self._run_embedding_batch(texts[i:i + MAX_REQUESTS_PER_BATCH], offset=i)
+            for i in range(0, len(texts), MAX_REQUESTS_PER_BATCH)
+        ))
+        embeddings = [embedding for batch in results for embedding in batch]
+        logger.info("✓ Generated %s embeddings", len(embeddings))
+        
+        return embeddings
+    
+    async def embed_texts(
+        self,
+        texts: List[str],
+        token_counts: Optional[List[int]] = None
+    ) -> List[List[float]]:
+        """
+        Embed texts, routing large jobs through the Batch API if
+        batch_threshold is set
+        
+        The threshold applies to this call only, i.e. to one file's embed
+        round in ingest_documents. A Batch API job blocks the caller,
+        polling every batch_poll_interval seconds, until it completes.
+        
+        Args:
+            texts: List of text strings to embed
+            token_counts: Precomputed token count per text (optional)
+        
+        Returns:
+            List of embedding vectors
+        """
+        if self.batch_threshold and len(texts) > self.batch_threshold:
+            return await self.generate_embeddings_batch(texts)
+        return await self.generate_embeddings(texts, token_counts)
+    
+    def prepare_vectors(
+        self,
+        chunks: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+        positions: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Pair chunks with their embeddings in Endee's upsert format
+        
+        Embeddings are staged into one contiguous (N, D) float32 matrix and
+        each vector references a row of it, so no per-vector float lists are
+        kept and the rows serialize straight from the array.
         
-        print(f"✓ Created {len(chunks)} chunks\n")
+        Args:
+            chunks: Chunks with text and location metadata
+            embeddings: Embedding vector for each chunk, in the same order
+            positions: Position of each chunk within its file as chunked,
+                before filtering, so a chunk's ID does not depend on what
+                was dropped or uploaded alongside it (defaults to list order)
         
-        # Step 3: Generate embeddings
-        print("STEP 3: Generating embeddings...")
-        texts = [chunk["text"] for chunk in chunks]
-        embeddings = self.generate_embeddings(texts)
-        print()
+        Returns:
+            List of vector objects for EndeeAsyncClient.insert_documents
+        """
+        emb = np.asarray(embeddings, dtype=np.float32)
+        if positions is None:
+            positions = range(len(chunks))
         
-        # Step 4: Prepare vectors for Endee REST API
-        print("STEP 4: Preparing vectors for Endee...")
         vectors = []
-        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+        for idx, (chunk, position) in enumerate(zip(chunks, positions)):
             # Create unique ID
-            chunk_id = f"{chunk.get('document_name', 'unknown')}_{idx}"
+            chunk_id = f"{chunk.get('document_name', 'unknown')}_{position}"
             
             # Prepare metadata (combines display and filter data)
             metadata = {
@@ -171,32 +639,137 @@ class IngestionPipeline:
             # Format for Endee REST API
             vectors.append({
                 "id": chunk_id,
-                "vector": embedding,
+                "vector": emb[idx],
                 "metadata": metadata
             })
         
-        print(f"✓ Prepared {len(vectors)} vectors\n")
+        return vectors
+    
+    async def ingest_documents(
+        self,
+        files: Iterable[Tuple[FileSource, str]]
+    ) -> Dict[str, Any]:
+        """
+        Complete ingestion pipeline: load, chunk, embed, and store
         
-        # Step 5: Store in Endee via REST API
-        print("STEP 5: Storing vectors in Endee via REST API...")
-        upsert_result = self.endee_client.insert_documents(
-            index_name=self.index_name,
-            vectors=vectors
-        )
+        Files are parsed and chunked in parallel worker processes, a
+        bounded number ahead of the file currently being embedded and
+        stored, so only a few files' chunks and vectors are in memory at once.
+        
+        Args:
+            files: Iterable of (file_content, filename) tuples, where
+                file_content is bytes or a binary file object
+        
+        Returns:
+            Ingestion statistics
+        """
+        logger.info("=" * 60)
+        logger.info("STARTING DOCUMENT INGESTION")
+        logger.info("=" * 60)
+        
+        files_processed = 0
+        files_loaded = 0
+        chunks_created = 0
+        vectors_stored = 0
+        upsert_time_ms = 0.0
+        seen_chunks: Set[bytes] = set()
+        
+        async for filename, load_future in self._load_documents(files):
+            files_processed += 1
+            logger.info("→ Ingesting %s", filename)
+            
+            # Step 1: Load and chunk document (fused, in the worker pool)
+            logger.info("STEP 1: Loading and chunking document...")
+            try:
+                chunk_stream = iter(await load_future)
+            except Exception as e:
+                logger.error("✗ Failed to load %s: %s", filename, e)
+                continue
+            
+            files_loaded += 1
+            
+            # Embed and store in batches to bound peak memory
+            file_chunks = 0
+            file_vectors = 0
+            
+            while True:
+                chunks = list(islice(chunk_stream, self.chunk_batch_size))
+                if not chunks:
+                    break
+                
+                # Drop short/duplicate chunks before paying to embed and store
+                # them. Tokenizing (and the tokenizer's first load, which may
+                # download its BPE file) runs in a thread, off the event loop
+                n_chunked = len(chunks)
+                chunks, token_counts, positions = await asyncio.to_thread(self.filter_chunks, chunks, seen_chunks)
+                
+                # IDs follow each chunk's position in the file before filtering
+                positions = [file_chunks + position for position in positions]
+                file_chunks += n_chunked
+                
+                if len(chunks) < n_chunked:
+                    logger.info("→ Skipped %s short or duplicate chunks", n_chunked - len(chunks))
+                
+                if not chunks:
+                    continue
+                
+                # Step 2: Generate embeddings
+                logger.info("STEP 2: Generating embeddings...")
+                embeddings = await self.embed_texts(
+                    [chunk["text"] for chunk in chunks],
+                    token_counts
+                )
+                
+                # Step 3: Prepare vectors for Endee REST API
+                logger.info("STEP 3: Preparing vectors for Endee...")
+                vectors = self.prepare_vectors(chunks, embeddings, positions)
+                del embeddings
+                
+                # Step 4: Store in Endee via REST API
+                logger.info("STEP 4: Storing vectors in Endee via REST API...")
+                upsert_result = await self.endee_client.insert_documents(
+                    index_name=self.index_name,
+                    vectors=vectors,
+                    batch_size=self.upsert_batch_size,
+                    concurrency=self.upsert_concurrency
+                )
+                
+                chunks_created += len(chunks)
+                file_vectors += upsert_result["count"]
+                upsert_time_ms += upsert_result["elapsed_ms"]
+            
+            vectors_stored += file_vectors
+            logger.info("✓ Stored %s vectors from %s", file_vectors, filename)
+        
+        if not files_loaded:
+            return {
+                "success": False,
+                "error": "No documents were successfully loaded",
+                "chunks_created": 0,
+                "vectors_stored": 0
+            }
+        
+        if not chunks_created:
+            return {
+                "success": False,
+                "error": "No chunks were created",
+                "chunks_created": 0,
+                "vectors_stored": 0
+            }
         
-        print(f"\n{'='*60}")
-        print(f"INGESTION COMPLETE")
-        print(f"{'='*60}")
-        print(f"Files processed: {len(files)}")
-        print(f"Chunks created: {len(chunks)}")
-        print(f"Vectors stored: {upsert_result['count']}")
-        print(f"Upsert time: {upsert_result['elapsed_ms']} ms")
-        print(f"{'='*60}\n")
+        logger.info("=" * 60)
+        logger.info("INGESTION COMPLETE")
+        logger.info("=" * 60)
+        logger.info("Files processed: %s", files_processed)
+        logger.info("Chunks created: %s", chunks_created)
+        logger.info("Vectors stored: %s", vectors_stored)
+        logger.info("Upsert time: %.2f ms", upsert_time_ms)
+        logger.info("=" * 60)
         
         return {
             "success": True,
-            "files_processed": len(files),
-            "chunks_created": len(chunks),
-            "vectors_stored": upsert_result["count"],
-            "upsert_time_ms": upsert_result["elapsed_ms"]
+            "files_processed": files_processed,
+            "chunks_created": chunks_created,
+            "vectors_stored": vectors_stored,
+            "upsert_time_ms": upsert_time_ms
         }
@@ -5,15 +5,24 @@ RAG system with Endee vector database
 
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any
 import os
+import queue
+import asyncio
+import logging
+import logging.handlers
+import httpx
+import msgspec
 from dotenv import load_dotenv
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
-from endee_client import EndeeClient
+from endee_client import EndeeClient, EndeeAsyncClient
 from ingest import IngestionPipeline
 from retriever import Retriever
 from rag_pipeline import RAGPipeline
+from utils.chunker import CHUNK_MODES
 
 # Load environment variables
 load_dotenv()
@@ -22,15 +31,38 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ENDEE_BASE_URL = os.getenv("ENDEE_BASE_URL", "http://localhost:8080")
 ENDEE_INDEX_NAME = os.getenv("ENDEE_INDEX_NAME", "rag_documents")
+ENDEE_COMPRESS = os.getenv("ENDEE_COMPRESS", "true").lower() == "true"
+ENDEE_MAX_CONNECTIONS = int(os.getenv("ENDEE_MAX_CONNECTIONS", "64"))
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "1536"))
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4-turbo-preview")
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "500"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "50"))
+CHUNK_MODE = os.getenv("CHUNK_MODE", "chars").lower()
+CHUNK_CACHE_MB = int(os.getenv("CHUNK_CACHE_MB", "64"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+EMBEDDING_BATCH_THRESHOLD = int(os.getenv("EMBEDDING_BATCH_THRESHOLD", "0"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Log through a queue so request handlers never block on stdout writes;
+# the queue handler only merges the message arguments, and a listener
+# thread applies the full format and does the I/O
+log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+log_listener = logging.handlers.QueueListener(log_queue, log_handler)
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+log_listener.start()
+
+logger = logging.getLogger(__name__)
 
 # Validate configuration
 if not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY environment variable is required")
+if CHUNK_MODE not in CHUNK_MODES:
+    raise ValueError(f"CHUNK_MODE must be one of {CHUNK_MODES}, got {CHUNK_MODE!r}")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -48,30 +80,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Endee REST API client
-endee_client = EndeeClient(base_url=ENDEE_BASE_URL)
+# Initialize Endee REST API clients (sync for startup, async for request handlers)
+endee_client = EndeeClient(base_url=ENDEE_BASE_URL, compress=ENDEE_COMPRESS)
+endee_async_client = EndeeAsyncClient(
+    base_url=ENDEE_BASE_URL,
+    compress=ENDEE_COMPRESS,
+    max_connections=ENDEE_MAX_CONNECTIONS
+)
+
+# One OpenAI client (and connection pool) shared by ingest, retrieval and generation
+openai_client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    http_client=DefaultAsyncHttpxClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=128)
+    )
+)
+
+# Bounds concurrent OpenAI calls across all requests (size to your TPM tier)
+openai_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
 
 # Initialize pipelines
 ingestion_pipeline = IngestionPipeline(
-    openai_api_key=OPENAI_API_KEY,
-    endee_client=endee_client,
+    openai_client=openai_client,
+    endee_client=endee_async_client,
     index_name=ENDEE_INDEX_NAME,
     embedding_model=EMBEDDING_MODEL,
     chunk_size=CHUNK_SIZE,
-    chunk_overlap=CHUNK_OVERLAP
+    chunk_overlap=CHUNK_OVERLAP,
+    chunk_mode=CHUNK_MODE,
+    chunk_cache_bytes=CHUNK_CACHE_MB * 1024 * 1024,
+    batch_threshold=EMBEDDING_BATCH_THRESHOLD,
+    openai_semaphore=openai_semaphore
 )
 
 retriever = Retriever(
-    openai_api_key=OPENAI_API_KEY,
-    endee_client=endee_client,
+    openai_client=openai_client,
+    endee_client=endee_async_client,
     index_name=ENDEE_INDEX_NAME,
-    embedding_model=EMBEDDING_MODEL
+    embedding_model=EMBEDDING_MODEL,
+    openai_semaphore=openai_semaphore,
+    redis_url=REDIS_URL
 )
 
 rag_pipeline = RAGPipeline(
-    openai_api_key=OPENAI_API_KEY,
+    openai_client=openai_client,
     retriever=retriever,
-    llm_model=LLM_MODEL
+    llm_model=LLM_MODEL,
+    openai_semaphore=openai_semaphore
 )
 
 
@@ -98,26 +154,56 @@ class IngestResponse(BaseModel):
     upsert_time_ms: float
 
 
+def round_ms(value: float) -> float:
+    """Round a latency for the API response (timings are kept unrounded internally)"""
+    return round(value, 2)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Serialize a stream event as an SSE data line, rounding latency fields"""
+    event = {
+        key: round_ms(value) if key.endswith("_ms") else value
+        for key, value in event.items()
+    }
+    return f"data: {msgspec.json.encode(event).decode()}\n\n"
+
+
+async def warm_up_connections():
+    """Open pooled connections (DNS, TCP, TLS) to OpenAI and Endee before the first query"""
+    # Unit vector rather than all zeros, which is undefined under cosine similarity
+    probe_vector = [1.0] + [0.0] * (EMBEDDING_DIMENSION - 1)
+    
+    results = await asyncio.gather(
+        retriever.generate_query_embedding("warmup"),
+        endee_async_client.search(ENDEE_INDEX_NAME, probe_vector, top_k=1),
+        return_exceptions=True
+    )
+    
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("⚠ Connection warm-up failed: %s", result)
+
+
 # API Endpoints
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize Endee index on startup via REST API"""
-    print("\n" + "="*60)
-    print("INITIALIZING RAG APPLICATION")
-    print("="*60)
-    print(f"Endee URL: {ENDEE_BASE_URL}")
-    print(f"Index Name: {ENDEE_INDEX_NAME}")
-    print(f"Embedding Model: {EMBEDDING_MODEL}")
-    print(f"LLM Model: {LLM_MODEL}")
-    print("="*60 + "\n")
+    logger.info("=" * 60)
+    logger.info("INITIALIZING RAG APPLICATION")
+    logger.info("=" * 60)
+    logger.info("Endee URL: %s", ENDEE_BASE_URL)
+    logger.info("Index Name: %s", ENDEE_INDEX_NAME)
+    logger.info("Embedding Model: %s", EMBEDDING_MODEL)
+    logger.info("LLM Model: %s", LLM_MODEL)
+    logger.info("=" * 60)
     
     # Check Endee health
     if not endee_client.health_check():
-        print("⚠ WARNING: Cannot connect to Endee at", ENDEE_BASE_URL)
-        print("Please ensure Endee is running (docker-compose up -d)")
+        logger.warning("⚠ WARNING: Cannot connect to Endee at %s", ENDEE_BASE_URL)
+        logger.warning("Please ensure Endee is running (docker-compose up -d)")
     else:
-        print("✓ Endee service is healthy")
+        logger.info("✓ Endee service is healthy")
     
     # Create or connect to Endee index via REST API
     try:
@@ -127,8 +213,21 @@ async def startup_event():
             metric="cosine"
         )
     except Exception as e:
-        print(f"⚠ Warning: Could not create index: {str(e)}")
-        print("Index may already exist or Endee may not be running")
+        logger.warning("⚠ Warning: Could not create index: %s", e)
+        logger.warning("Index may already exist or Endee may not be running")
+    
+    # Warm up in the background so startup is not delayed
+    app.state.warmup_task = asyncio.create_task(warm_up_connections())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled Endee/OpenAI connections, ingestion workers and the log listener"""
+    endee_client.close()
+    await endee_async_client.aclose()
+    await openai_client.close()
+    log_listener.stop()
+    ingestion_pipeline.close()
 
 
 @app.get("/")
@@ -150,6 +249,10 @@ async def ingest_documents(files: List[UploadFile] = File(...)):
     Accepts multiple PDF and DOCX files, chunks them, generates embeddings,
     and stores vectors in Endee with metadata.
     
+    If EMBEDDING_BATCH_THRESHOLD is set, a file producing more chunks than
+    that is embedded through the OpenAI Batch API, and the request waits
+    until that batch completes (up to the 24h batch window).
+    
     Args:
         files: List of uploaded files (.pdf or .docx)
     
@@ -158,7 +261,6 @@ async def ingest_documents(files: List[UploadFile] = File(...)):
     """
     # Validate file types
     allowed_extensions = {".pdf", ".docx", ".doc"}
-    file_data = []
     
     for file in files:
         file_ext = os.path.splitext(file.filename)[1].lower()
@@ -168,12 +270,12 @@ async def ingest_documents(files: List[UploadFile] = File(...)):
                 status_code=400,
                 detail=f"File type {file_ext} not supported. Only PDF and DOCX files are allowed."
             )
-        
-        # Read file content
-        content = await file.read()
-        file_data.append((content, file.filename))
     
-    if not file_data:
+    # Hand over the spooled upload files; the pipeline reads each one only
+    # when it is sent to a loader worker, not all of them up front
+    file_data = ((file.file, file.filename) for file in files)
+    
+    if not files:
         raise HTTPException(
             status_code=400,
             detail="No valid files provided"
@@ -181,7 +283,7 @@ async def ingest_documents(files: List[UploadFile] = File(...)):
     
     try:
         # Run ingestion pipeline
-        result = ingestion_pipeline.ingest_documents(file_data)
+        result = await ingestion_pipeline.ingest_documents(file_data)
         
         if not result["success"]:
             raise HTTPException(
@@ -189,17 +291,20 @@ async def ingest_documents(files: List[UploadFile] = File(...)):
                 detail=result.get("error", "Ingestion failed")
             )
         
+        # New vectors can change search results for previously cached queries
+        retriever.clear_result_cache()
+        
         return IngestResponse(
             success=True,
             message=f"Successfully ingested {result['files_processed']} files",
             files_processed=result["files_processed"],
             chunks_created=result["chunks_created"],
             vectors_stored=result["vectors_stored"],
-            upsert_time_ms=result["upsert_time_ms"]
+            upsert_time_ms=round_ms(result["upsert_time_ms"])
         )
         
     except Exception as e:
-        print(f"✗ Ingestion error: {str(e)}")
+        logger.error("✗ Ingestion error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Ingestion failed: {str(e)}"
@@ -228,27 +333,63 @@ async def query_rag(request: QueryRequest):
     
     try:
         # Run RAG pipeline
-        result = rag_pipeline.generate_answer(
+        result = await rag_pipeline.generate_answer(
             query=request.query,
             top_k=request.top_k
         )
         
         return QueryResponse(
             answer=result["answer"],
-            chunks=result["chunks"],
-            retrieval_latency_ms=result["retrieval_latency_ms"],
-            generation_latency_ms=result["generation_latency_ms"],
-            total_latency_ms=result["total_latency_ms"]
+            chunks=msgspec.to_builtins(result["chunks"]),
+            retrieval_latency_ms=round_ms(result["retrieval_latency_ms"]),
+            generation_latency_ms=round_ms(result["generation_latency_ms"]),
+            total_latency_ms=round_ms(result["total_latency_ms"])
         )
         
     except Exception as e:
-        print(f"✗ Query error: {str(e)}")
+        logger.error("✗ Query error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Query failed: {str(e)}"
         )
 
 
+@app.post("/query/stream")
+async def query_rag_stream(request: QueryRequest):
+    """
+    Query the RAG system, streaming the answer as Server-Sent Events
+    
+    The first event carries the retrieved chunks and retrieval latency,
+    followed by answer token deltas and a final event with latencies.
+    
+    Args:
+        request: Query request with query text and optional top_k
+    
+    Returns:
+        text/event-stream response of JSON events
+    """
+    if not request.query or not request.query.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Query cannot be empty"
+        )
+    
+    async def event_stream():
+        try:
+            async for event in rag_pipeline.stream_answer(
+                query=request.query,
+                top_k=request.top_k
+            ):
+                yield format_sse(event)
+        except Exception as e:
+            # Headers are already sent, so report failures in-band
+            logger.error("✗ Query error: %s", e)
+            error = {"type": "error", "detail": f"Query failed: {str(e)}"}
+            yield format_sse(error)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.get("/stats")
 async def get_stats():
     """Get system statistics"""
@@ -258,7 +399,8 @@ async def get_stats():
             "embedding_model": EMBEDDING_MODEL,
             "llm_model": LLM_MODEL,
             "chunk_size": CHUNK_SIZE,
-            "chunk_overlap": CHUNK_OVERLAP
+            "chunk_overlap": CHUNK_OVERLAP,
+            "chunk_mode": CHUNK_MODE
         }
     }
 
@@ -3,10 +3,42 @@ RAG Pipeline
 Combines retrieval and generation with citation support
 """
 
+import io
 import re
-from typing import List, Dict, Any
-from openai import OpenAI
-from retriever import Retriever
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, AsyncIterator
+from openai import AsyncOpenAI
+from retriever import Retriever, Chunk
+
+
+logger = logging.getLogger(__name__)
+
+# RAG prompt with citation instructions
+PROMPT_TEMPLATE = """You are a helpful assistant that answers questions based on the provided context.
+
+CONTEXT:
+{context}
+
+INSTRUCTIONS:
+1. Answer the user's question using ONLY the information from the context above
+2. After EACH sentence in your answer, add an inline citation in the format [source_name – page/section]
+3. Use the exact citation format shown in the context (e.g., [document.pdf – page 5])
+4. If the context doesn't contain enough information to answer, say so clearly
+5. Be concise and accurate
+
+USER QUESTION:
+{query}
+
+ANSWER:"""
+
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful assistant that provides accurate answers with citations."
+}
+
+NO_RESULTS_ANSWER = "I couldn't find any relevant information to answer your question."
 
 
 class RAGPipeline:
@@ -14,45 +46,47 @@ class RAGPipeline:
     
     def __init__(
         self,
-        openai_api_key: str,
+        openai_client: AsyncOpenAI,
         retriever: Retriever,
-        llm_model: str = "gpt-4-turbo-preview"
+        llm_model: str = "gpt-4-turbo-preview",
+        openai_semaphore: Optional[asyncio.Semaphore] = None
     ):
         """
         Initialize RAG pipeline
         
         Args:
-            openai_api_key: OpenAI API key
+            openai_client: Shared async OpenAI client
             retriever: Initialized retriever
             llm_model: OpenAI chat model for generation
+            openai_semaphore: Shared limit on in-flight OpenAI requests
         """
-        self.openai_client = OpenAI(api_key=openai_api_key)
+        self.openai_client = openai_client
+        self.openai_semaphore = openai_semaphore or asyncio.Semaphore(16)
         self.retriever = retriever
         self.llm_model = llm_model
+        
+        # Split the static template once so only per-query parts are formatted
+        self._prompt_head, rest = PROMPT_TEMPLATE.split("{context}")
+        self._prompt_tail, self._prompt_suffix = rest.split("{query}")
     
-    def format_citation(self, chunk: Dict[str, Any]) -> str:
+    def format_citation(self, chunk: Chunk) -> str:
         """
         Format citation for a chunk
         
         Args:
-            chunk: Chunk metadata
+            chunk: Retrieved chunk
         
         Returns:
             Citation string in format: [source_name – page/section]
         """
-        doc_name = chunk.get("document_name", "Unknown")
-        
         # Use page number if available (PDF), otherwise paragraph index (DOCX)
-        if chunk.get("page_number"):
-            location = f"page {chunk['page_number']}"
-        elif chunk.get("paragraph_index"):
-            location = f"para {chunk['paragraph_index']}"
-        else:
-            location = f"chunk {chunk.get('chunk_index', 0)}"
-        
-        return f"[{doc_name} – {location}]"
+        if chunk.page_number:
+            return f"[{chunk.document_name} – page {chunk.page_number}]"
+        if chunk.paragraph_index:
+            return f"[{chunk.document_name} – para {chunk.paragraph_index}]"
+        return f"[{chunk.document_name} – chunk {chunk.chunk_index}]"
     
-    def construct_prompt(self, query: str, chunks: List[Dict[str, Any]]) -> str:
+    def construct_prompt(self, query: str, chunks: List[Chunk]) -> str:
         """
         Construct RAG prompt with retrieved context
         
@@ -63,35 +97,36 @@ class RAGPipeline:
         Returns:
             Formatted prompt for LLM
         """
+        buf = io.StringIO()
+        buf.write(self._prompt_head)
+        
         # Build context from chunks
-        context_parts = []
         for idx, chunk in enumerate(chunks, 1):
-            citation = self.format_citation(chunk)
-            context_parts.append(f"[{idx}] {citation}\n{chunk['text']}\n")
-        
-        context = "\n".join(context_parts)
+            if idx > 1:
+                buf.write("\n")
+            buf.write(f"[{idx}] {self.format_citation(chunk)}\n")
+            buf.write(chunk.text)
+            buf.write("\n")
         
-        # Construct prompt with citation instructions
-        prompt = f"""You are a helpful assistant that answers questions based on the provided context.
-
-CONTEXT:
-{context}
-
-INSTRUCTIONS:
-1. Answer the user's question using ONLY the information from the context above
-2. After EACH sentence in your answer, add an inline citation in the format [source_name – page/section]
-3. Use the exact citation format shown in the context (e.g., [document.pdf – page 5])
-4. If the context doesn't contain enough information to answer, say so clearly
-5. Be concise and accurate
-
-USER QUESTION:
-{query}
-
-ANSWER:"""
+        buf.write(self._prompt_tail)
+        buf.write(query)
+        buf.write(self._prompt_suffix)
         
-        return prompt
+        return buf.getvalue()
+    
+    def _chat_params(self, prompt: str) -> Dict[str, Any]:
+        """Chat completion parameters for an answer prompt"""
+        return {
+            "model": self.llm_model,
+            "messages": [
+                SYSTEM_MESSAGE,
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 1000
+        }
     
-    def generate_answer(
+    async def generate_answer(
         self,
         query: str,
         top_k: int = 5
@@ -107,57 +142,116 @@ ANSWER:"""
             Dict with answer, citations, and metrics:
             {
                 "answer": str,
-                "chunks": List[Dict],
+                "chunks": List[Chunk],
                 "retrieval_latency_ms": float,
                 "generation_latency_ms": float,
                 "total_latency_ms": float
             }
         """
-        import time
-        
-        total_start = time.time()
+        total_start = time.perf_counter_ns()
         
         # Step 1: Retrieve relevant chunks
-        retrieval_result = self.retriever.retrieve(query, top_k=top_k)
+        retrieval_result = await self.retriever.retrieve(query, top_k=top_k)
         chunks = retrieval_result["chunks"]
         retrieval_latency = retrieval_result["retrieval_latency_ms"]
         
         if not chunks:
             return {
-                "answer": "I couldn't find any relevant information to answer your question.",
+                "answer": NO_RESULTS_ANSWER,
                 "chunks": [],
                 "retrieval_latency_ms": retrieval_latency,
                 "generation_latency_ms": 0,
-                "total_latency_ms": (time.time() - total_start) * 1000
+                "total_latency_ms": (time.perf_counter_ns() - total_start) / 1_000_000
             }
         
         # Step 2: Construct prompt
         prompt = self.construct_prompt(query, chunks)
         
         # Step 3: Generate answer
-        print(f"→ Generating answer using {self.llm_model}...")
-        gen_start = time.time()
+        logger.info("→ Generating answer using %s...", self.llm_model)
+        gen_start = time.perf_counter_ns()
         
-        response = self.openai_client.chat.completions.create(
-            model=self.llm_model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that provides accurate answers with citations."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=1000
-        )
+        async with self.openai_semaphore:
+            response = await self.openai_client.chat.completions.create(
+                **self._chat_params(prompt)
+            )
         
         answer = response.choices[0].message.content
-        generation_latency = (time.time() - gen_start) * 1000
-        total_latency = (time.time() - total_start) * 1000
+        generation_latency = (time.perf_counter_ns() - gen_start) / 1_000_000
+        total_latency = (time.perf_counter_ns() - total_start) / 1_000_000
         
-        print(f"✓ Generated answer (latency: {generation_latency:.2f} ms)")
+        logger.info("✓ Generated answer (latency: %.2f ms)", generation_latency)
         
         return {
             "answer": answer,
             "chunks": chunks,
-            "retrieval_latency_ms": round(retrieval_latency, 2),
-            "generation_latency_ms": round(generation_latency, 2),
-            "total_latency_ms": round(total_latency, 2)
+            "retrieval_latency_ms": retrieval_latency,
+            "generation_latency_ms": generation_latency,
+            "total_latency_ms": total_latency
+        }
+    
+    async def stream_answer(
+        self,
+        query: str,
+        top_k: int = 5
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate answer with citations using RAG, streaming tokens as they arrive
+        
+        Args:
+            query: User query
+            top_k: Number of chunks to retrieve
+        
+        Yields:
+            Event dicts, in order:
+            {"type": "retrieval", "chunks": List[Chunk], "retrieval_latency_ms": float}
+            {"type": "delta", "delta": str}  (one per streamed token group)
+            {"type": "done", "generation_latency_ms": float, "total_latency_ms": float}
+        """
+        total_start = time.perf_counter_ns()
+        
+        # Step 1: Retrieve relevant chunks and send citations before any tokens
+        retrieval_result = await self.retriever.retrieve(query, top_k=top_k)
+        chunks = retrieval_result["chunks"]
+        
+        yield {
+            "type": "retrieval",
+            "chunks": chunks,
+            "retrieval_latency_ms": retrieval_result["retrieval_latency_ms"]
+        }
+        
+        if not chunks:
+            yield {"type": "delta", "delta": NO_RESULTS_ANSWER}
+            yield {
+                "type": "done",
+                "generation_latency_ms": 0,
+                "total_latency_ms": (time.perf_counter_ns() - total_start) / 1_000_000
+            }
+            return
+        
+        # Step 2: Construct prompt
+        prompt = self.construct_prompt(query, chunks)
+        
+        # Step 3: Stream answer tokens
+        logger.info("→ Streaming answer using %s...", self.llm_model)
+        gen_start = time.perf_counter_ns()
+        
+        async with self.openai_semaphore:
+            stream = await self.openai_client.chat.completions.create(
+                **self._chat_params(prompt),
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield {"type": "delta", "delta": chunk.choices[0].delta.content}
+        
+        generation_latency = (time.perf_counter_ns() - gen_start) / 1_000_000
+        total_latency = (time.perf_counter_ns() - total_start) / 1_000_000
+        
+        logger.info("✓ Streamed answer (latency: %.2f ms)", generation_latency)
+        
+        yield {
+            "type": "done",
+            "generation_latency_ms": generation_latency,
+            "total_latency_ms": total_latency
         }
@@ -3,9 +3,64 @@ Vector Retrieval Module
 Handles query embedding and vector search in Endee
 """
 
-from typing import List, Dict, Any
-from openai import OpenAI
-from endee_client import EndeeClient
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+import msgspec
+import numpy as np
+import orjson
+from cachetools import TTLCache
+from openai import AsyncOpenAI
+from endee_client import EndeeAsyncClient
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Redis cache tier is optional
+    redis = None
+
+
+logger = logging.getLogger(__name__)
+
+# In-process LRU of query embeddings, keyed by sha256(model|query)
+EMBEDDING_CACHE_SIZE = 4096
+_emb_cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
+
+
+class Chunk(msgspec.Struct, gc=False):
+    """Retrieved chunk with its similarity score and source location"""
+    id: str
+    similarity: float
+    text: str
+    document_name: str
+    page_number: Optional[int] = None
+    paragraph_index: Optional[int] = None
+    chunk_index: int = 0
+
+
+class HitMetadata(msgspec.Struct, gc=False):
+    """Chunk metadata stored alongside each vector at ingest"""
+    text: str = ""
+    document_name: str = ""
+    page_number: Optional[int] = None
+    paragraph_index: Optional[int] = None
+    chunk_index: int = 0
+
+
+class SearchHit(msgspec.Struct, gc=False):
+    """Single Endee search result"""
+    id: str = ""
+    score: float = 0.0
+    metadata: Optional[HitMetadata] = None
+
+
+class SearchResponse(msgspec.Struct, gc=False):
+    """Endee search response body"""
+    results: List[SearchHit] = []
+
+
+_EMPTY_METADATA = HitMetadata()
 
 
 class Retriever:
@@ -13,43 +68,114 @@ class Retriever:
     
     def __init__(
         self,
-        openai_api_key: str,
-        endee_client: EndeeClient,
+        openai_client: AsyncOpenAI,
+        endee_client: EndeeAsyncClient,
         index_name: str,
-        embedding_model: str = "text-embedding-3-small"
+        embedding_model: str = "text-embedding-3-small",
+        openai_semaphore: Optional[asyncio.Semaphore] = None,
+        redis_url: Optional[str] = None,
+        embedding_cache_ttl: int = 86400,
+        result_cache_size: int = 10_000,
+        result_cache_ttl: int = 300
     ):
         """
         Initialize retriever
         
         Args:
-            openai_api_key: OpenAI API key
-            endee_client: Initialized Endee REST API client
+            openai_client: Shared async OpenAI client
+            endee_client: Initialized async Endee REST API client
             index_name: Name of Endee index to query
             embedding_model: OpenAI embedding model (must match ingestion model)
+            openai_semaphore: Shared limit on in-flight OpenAI requests
+            redis_url: Optional Redis URL for a shared query embedding cache
+            embedding_cache_ttl: Seconds to keep embeddings in Redis
+            result_cache_size: Maximum cached search results
+            result_cache_ttl: Seconds to keep cached search results
         """
-        self.openai_client = OpenAI(api_key=openai_api_key)
+        self.openai_client = openai_client
+        self.openai_semaphore = openai_semaphore or asyncio.Semaphore(16)
         self.endee_client = endee_client
         self.index_name = index_name
         self.embedding_model = embedding_model
+        self.embedding_cache_ttl = embedding_cache_ttl
+        
+        # Search results keyed by (sha1 of query embedding, top_k)
+        self._result_cache = TTLCache(maxsize=result_cache_size, ttl=result_cache_ttl)
+        
+        self.redis = None
+        if redis_url:
+            if redis is None:
+                logger.warning("⚠ REDIS_URL is set but the redis package is not installed; using in-process cache only")
+            else:
+                self.redis = redis.from_url(redis_url)
+    
+    def clear_result_cache(self) -> None:
+        """Drop cached search results (e.g. after new documents are ingested)"""
+        self._result_cache.clear()
+    
+    def _cache_embedding(self, key: bytes, embedding: List[float]) -> None:
+        """Store an embedding in the in-process LRU, evicting the oldest entry"""
+        _emb_cache[key] = embedding
+        _emb_cache.move_to_end(key)
+        if len(_emb_cache) > EMBEDDING_CACHE_SIZE:
+            _emb_cache.popitem(last=False)
     
-    def generate_query_embedding(self, query: str) -> List[float]:
+    async def generate_query_embedding(self, query: str) -> List[float]:
         """
         Generate embedding for query text
         
+        Repeated queries are served from the in-process LRU, then from
+        Redis (if configured), before falling back to OpenAI.
+        
         Args:
             query: User query string
         
         Returns:
             Query embedding vector
         """
-        response = self.openai_client.embeddings.create(
-            model=self.embedding_model,
-            input=[query]
-        )
+        key = hashlib.sha256(f"{self.embedding_model}|{query}".encode("utf-8")).digest()
+        
+        embedding = _emb_cache.get(key)
+        if embedding is not None:
+            _emb_cache.move_to_end(key)
+            return embedding
         
-        return response.data[0].embedding
+        redis_key = b"emb:" + key
+        if self.redis is not None:
+            try:
+                cached = await self.redis.get(redis_key)
+            except redis.RedisError as e:
+                logger.warning("⚠ Redis embedding cache unavailable: %s", e)
+                cached = None
+            
+            if cached is not None:
+                embedding = np.frombuffer(cached, dtype=np.float32).tolist()
+                self._cache_embedding(key, embedding)
+                return embedding
+        
+        async with self.openai_semaphore:
+            response = await self.openai_client.embeddings.create(
+                model=self.embedding_model,
+                input=[query]
+            )
+        
+        embedding = response.data[0].embedding
+        self._cache_embedding(key, embedding)
+        
+        if self.redis is not None:
+            # float32 bytes are ~6KB for 1536 dims, far smaller than JSON
+            try:
+                await self.redis.set(
+                    redis_key,
+                    np.asarray(embedding, dtype=np.float32).tobytes(),
+                    ex=self.embedding_cache_ttl
+                )
+            except redis.RedisError as e:
+                logger.warning("⚠ Redis embedding cache unavailable: %s", e)
+        
+        return embedding
     
-    def retrieve(
+    async def retrieve(
         self,
         query: str,
         top_k: int = 5
@@ -64,43 +190,53 @@ class Retriever:
         Returns:
             Dict with retrieved chunks and latency:
             {
-                "chunks": List[Dict],
+                "chunks": List[Chunk],
                 "retrieval_latency_ms": float,
                 "query": str
             }
         """
-        print(f"\n→ Retrieving top {top_k} chunks for query: '{query}'")
+        logger.info("→ Retrieving top %s chunks for query: '%s'", top_k, query)
         
         # Generate query embedding
-        query_embedding = self.generate_query_embedding(query)
+        query_embedding = await self.generate_query_embedding(query)
+        
+        # Identical embedding and top_k: skip the Endee round trip
+        cache_key = (hashlib.sha1(orjson.dumps(query_embedding)).digest(), top_k)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            logger.info("✓ Retrieved %s chunks (cached)", len(cached['chunks']))
+            return {**cached, "retrieval_latency_ms": 0.0, "query": query}
         
         # Query Endee via REST API (latency is tracked inside endee_client)
-        result = self.endee_client.search(
+        result = await self.endee_client.search(
             index_name=self.index_name,
             query_vector=query_embedding,
             top_k=top_k,
-            include_metadata=True
+            include_metadata=True,
+            response_type=SearchResponse
         )
         
-        # Extract and format chunks from REST API response
+        # Flatten typed REST API hits into chunks
         chunks = []
-        for item in result["results"]:
-            metadata = item.get("metadata", {})
-            chunk = {
-                "id": item.get("id", ""),
-                "similarity": item.get("score", 0.0),  # REST API returns 'score'
-                "text": metadata.get("text", ""),
-                "document_name": metadata.get("document_name", ""),
-                "page_number": metadata.get("page_number"),
-                "paragraph_index": metadata.get("paragraph_index"),
-                "chunk_index": metadata.get("chunk_index", 0)
-            }
-            chunks.append(chunk)
+        for hit in result["results"]:
+            metadata = hit.metadata or _EMPTY_METADATA
+            chunks.append(Chunk(
+                id=hit.id,
+                similarity=hit.score,  # REST API returns 'score'
+                text=metadata.text,
+                document_name=metadata.document_name,
+                page_number=metadata.page_number,
+                paragraph_index=metadata.paragraph_index,
+                chunk_index=metadata.chunk_index
+            ))
         
-        print(f"✓ Retrieved {len(chunks)} chunks (latency: {result['retrieval_latency_ms']} ms)")
+        logger.info("✓ Retrieved %s chunks (latency: %.2f ms)", len(chunks), result['retrieval_latency_ms'])
         
-        return {
+        retrieval_result = {
             "chunks": chunks,
             "retrieval_latency_ms": result["retrieval_latency_ms"],
             "query": query
         }
+        self._result_cache[cache_key] = retrieval_result
+        
+        return retrieval_result
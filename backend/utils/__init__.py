@@ -1 +1,6 @@
 """Utils package"""
+
+import logging
+
+# Library modules log through "utils.*"; stay silent unless the app configures logging
+logging.getLogger(__name__).addHandler(logging.NullHandler())
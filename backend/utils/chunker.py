@@ -3,23 +3,212 @@ Document Utilities - Text Chunker
 Splits text into overlapping chunks with metadata preservation
 """
 
-from typing import List, Dict, Any
+import re
+import logging
+import warnings
+from bisect import bisect_right
+from functools import partial, lru_cache
+from itertools import accumulate
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Callable, Tuple
+
+try:
+    from utils.chunker_ext import char_windows as _char_windows_ext
+except ImportError:  # Compiled loop is optional (build with cythonize, see README)
+    _char_windows_ext = None
+
+
+logger = logging.getLogger(__name__)
+
+# Defaults: 500-character windows advancing 450 characters (50 overlap)
+DEFAULT_WINDOW_SIZE = 500
+DEFAULT_STRIDE = 450
+
+# "chars": fixed character windows; "sentences": whole sentences packed
+# greedily up to window_size, overlapping by trailing sentences
+CHUNK_MODES = ("chars", "sentences")
+
+# End of a sentence: terminal punctuation followed by whitespace (the
+# sentence keeps its punctuation; the whitespace is the break)
+_SENTENCE_BREAK = re.compile(r"[.!?]\s+")
+
+# Joins page texts when a paged document is chunked as one text
+PAGE_SEPARATOR = "\n"
+
+
+# Window generator with window_size / stride baked in as literals by
+# _make_chunker, over text that has been normalized once so windows are
+# bare slices. Full windows start at 0, stride, 2*stride, ... up to
+# n - window_size; if the last of them stops short of the end, one final
+# partial window covers the tail. isspace() stops at the first non-blank
+# character, so skipping all-whitespace windows (long blank runs inside
+# the text) stays cheap.
+_CHUNKER_SOURCE = """
+def windows(text):
+    n = len(text)
+    if not n:
+        return
+    stop = max(n - {window_size} + 1, 1)
+    for start in range(0, stop, {stride}):
+        piece = text[start:start + {window_size}]
+        if not piece.isspace():
+            yield start, piece
+    last = (stop - 1) // {stride} * {stride}
+    if last + {window_size} < n:
+        piece = text[last + {stride}:]
+        if not piece.isspace():
+            yield last + {stride}, piece
+"""
+
+
+def _resolve_window(
+    window_size: int,
+    stride: int,
+    chunk_size: Optional[int],
+    chunk_overlap: Optional[int]
+) -> Tuple[int, int]:
+    """Map the deprecated chunk_size / chunk_overlap arguments onto window_size / stride"""
+    if chunk_size is None and chunk_overlap is None:
+        return window_size, stride
+    
+    warnings.warn(
+        "chunk_size/chunk_overlap are deprecated; use window_size and stride "
+        "(stride = window_size - overlap)",
+        DeprecationWarning,
+        stacklevel=3
+    )
+    if chunk_size is not None:
+        window_size = chunk_size
+    overlap = chunk_overlap if chunk_overlap is not None else DEFAULT_WINDOW_SIZE - DEFAULT_STRIDE
+    return window_size, window_size - overlap
+
+
+@lru_cache(maxsize=32)
+def _make_chunker(
+    window_size: int,
+    stride: int
+) -> Callable[[str], Iterator[Tuple[int, str]]]:
+    """
+    Compile a window generator specialized for one (window_size, stride) pair
+    
+    The parameters are effectively constant for the app, so they are
+    inlined as constants rather than re-read and re-validated per call.
+    The generator yields (start offset, chunk text) for normalized text.
+    """
+    window_size = int(window_size)
+    stride = int(stride)
+    if not 0 < stride <= window_size:
+        raise ValueError("stride must be between 1 and window_size")
+    
+    namespace: Dict[str, Any] = {}
+    source = _CHUNKER_SOURCE.format(window_size=window_size, stride=stride)
+    exec(compile(source, f"<chunker window={window_size} stride={stride}>", "exec"), namespace)
+    return namespace["windows"]
+
+
+def _sentence_windows(
+    text: str,
+    window_size: int,
+    stride: int
+) -> Iterator[Tuple[int, str]]:
+    """
+    Pack whole sentences into windows of at most window_size characters
+    
+    Consecutive windows share their trailing sentences, up to
+    window_size - stride characters of them. A sentence longer than
+    window_size is split with fixed character windows instead.
+    """
+    if not text:
+        return
+    
+    # Split once into (start, end) sentence spans
+    spans = []
+    pos = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        spans.append((pos, match.start() + 1))
+        pos = match.end()
+    spans.append((pos, len(text)))
+    
+    overlap = window_size - stride
+    n = len(spans)
+    i = 0
+    while i < n:
+        start, end = spans[i]
+        
+        if end - start > window_size:
+            for offset, piece in _window_function(window_size, stride, "chars")(text[start:end]):
+                yield start + offset, piece
+            i += 1
+            continue
+        
+        # Greedily add sentences while the window still fits
+        j = i + 1
+        while j < n and spans[j][1] - start <= window_size:
+            j += 1
+        end = spans[j - 1][1]
+        yield start, text[start:end]
+        
+        if j >= n:
+            break
+        
+        # Restart at the earliest trailing sentences that fit in the overlap,
+        # always advancing by at least one sentence
+        k = j
+        while k - 1 > i and end - spans[k - 1][0] <= overlap:
+            k -= 1
+        i = k
+
+
+@lru_cache(maxsize=32)
+def _window_function(
+    window_size: int,
+    stride: int,
+    mode: str
+) -> Callable[[str], Iterator[Tuple[int, str]]]:
+    """
+    Validate the parameters and return the window generator for a mode
+    
+    Cached, since it runs once per document.
+    """
+    if mode not in CHUNK_MODES:
+        raise ValueError(f"Unknown chunk mode: {mode!r} (expected one of {CHUNK_MODES})")
+    
+    char_windows = _make_chunker(window_size, stride)
+    if mode == "chars":
+        if _char_windows_ext is not None:
+            return partial(_char_windows_ext, window_size=window_size, stride=stride)
+        return char_windows
+    return partial(_sentence_windows, window_size=window_size, stride=stride)
 
 
 def chunk_text(
     text: str,
-    chunk_size: int = 500,
-    chunk_overlap: int = 50,
-    metadata: Dict[str, Any] = None
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    metadata: Dict[str, Any] = None,
+    *,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    stride: int = DEFAULT_STRIDE,
+    mode: str = "chars"
 ) -> List[Dict[str, Any]]:
     """
     Split text into overlapping chunks
     
+    window_size, stride and mode are keyword-only: the second and third
+    positional slots keep their old chunk_size / chunk_overlap meaning
+    (with a DeprecationWarning), so older positional calls still chunk
+    the way they used to.
+    
     Args:
         text: Text to chunk
-        chunk_size: Maximum characters per chunk
-        chunk_overlap: Number of overlapping characters between chunks
+        chunk_size: Deprecated alias for window_size
+        chunk_overlap: Deprecated; overlap in characters (stride =
+            window_size - chunk_overlap)
         metadata: Metadata to attach to each chunk
+        window_size: Maximum characters per chunk
+        stride: Characters between consecutive chunk starts
+            (window_size - stride characters overlap)
+        mode: "chars" for fixed character windows, or "sentences" to
+            pack whole sentences
     
     Returns:
         List of chunks with metadata:
@@ -29,73 +218,136 @@ def chunk_text(
             **metadata
         }
     """
-    if not text or not text.strip():
-        return []
+    if chunk_size is not None or chunk_overlap is not None:
+        window_size, stride = _resolve_window(window_size, stride, chunk_size, chunk_overlap)
     
-    chunks = []
-    start = 0
-    chunk_index = 0
+    text = text.strip() if text else ""
+    md = metadata if metadata else {}
     
-    while start < len(text):
-        # Calculate end position
-        end = start + chunk_size
-        
-        # Extract chunk
-        chunk = text[start:end].strip()
-        
-        if chunk:
-            chunk_data = {
-                "text": chunk,
-                "chunk_index": chunk_index,
-                **(metadata or {})
-            }
-            chunks.append(chunk_data)
-            chunk_index += 1
-        
-        # Move to next chunk with overlap
-        start = end - chunk_overlap
-        
-        # Prevent infinite loop
-        if start >= len(text):
-            break
+    # Most paragraphs fit in one window, so skip the window generator for
+    # them; invalid parameters fall through to _window_function to raise
+    if len(text) <= window_size and 0 < stride <= window_size and mode in CHUNK_MODES:
+        return [{"text": text, "chunk_index": 0, **md}] if text else []
     
-    return chunks
+    windows = _window_function(window_size, stride, mode)
+    return [{"text": piece, "chunk_index": chunk_index, **md} for chunk_index, (_, piece) in enumerate(windows(text))]
+
+
+def _metadata(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract metadata (everything except 'text')
+    
+    A C-level dict copy plus one delete, instead of a comprehension that
+    re-inserts every key; key order is preserved.
+    """
+    metadata = dict(doc)
+    metadata.pop("text", None)
+    return metadata
 
 
 def chunk_documents(
-    documents: List[Dict[str, Any]],
-    chunk_size: int = 500,
-    chunk_overlap: int = 50
-) -> List[Dict[str, Any]]:
+    documents: Iterable[Dict[str, Any]],
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    *,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    stride: int = DEFAULT_STRIDE,
+    mode: str = "chars"
+) -> Iterator[Dict[str, Any]]:
     """
     Chunk multiple documents while preserving metadata
     
+    Documents are chunked one at a time and their chunks yielded straight
+    away, so documents can be streamed in from a loader and chunks
+    consumed in batches.
+    
     Args:
-        documents: List of document dicts with 'text' field
-        chunk_size: Maximum characters per chunk
-        chunk_overlap: Number of overlapping characters
+        documents: Document dicts with 'text' field
+        chunk_size: Deprecated alias for window_size
+        chunk_overlap: Deprecated; overlap in characters
+        window_size: Maximum characters per chunk
+        stride: Characters between consecutive chunk starts
+        mode: "chars" or "sentences" (see chunk_text)
     
-    Returns:
-        List of all chunks from all documents with preserved metadata
+    Yields:
+        Chunks from all documents, in document order, with preserved metadata
     """
-    all_chunks = []
+    window_size, stride = _resolve_window(window_size, stride, chunk_size, chunk_overlap)
+    n_documents = 0
+    n_chunks = 0
     
     for doc in documents:
-        text = doc.get("text", "")
-        
-        # Extract metadata (everything except 'text')
-        metadata = {k: v for k, v in doc.items() if k != "text"}
-        
-        # Chunk this document
         doc_chunks = chunk_text(
-            text=text,
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            metadata=metadata
+            doc.get("text", ""),
+            metadata=_metadata(doc),
+            window_size=window_size,
+            stride=stride,
+            mode=mode
         )
-        
-        all_chunks.extend(doc_chunks)
+        n_documents += 1
+        n_chunks += len(doc_chunks)
+        yield from doc_chunks
+    
+    logger.debug("✓ Created %d chunks from %d documents", n_chunks, n_documents)
+
+
+def chunk_pages(
+    pages: List[Dict[str, Any]],
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    *,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    stride: int = DEFAULT_STRIDE,
+    mode: str = "chars"
+) -> List[Dict[str, Any]]:
+    """
+    Chunk the pages of one document as a single text
+    
+    Chunks can span page breaks, and the document is chunked in one call
+    instead of once per page. Each chunk takes the metadata (page_number,
+    document_name, ...) of the page it starts on, found by bisecting the
+    page offsets.
+    
+    Args:
+        pages: Page dicts of a single document, in order, with 'text' field
+        chunk_size: Deprecated alias for window_size
+        chunk_overlap: Deprecated; overlap in characters
+        window_size: Maximum characters per chunk
+        stride: Characters between consecutive chunk starts
+        mode: "chars" or "sentences" (see chunk_text)
     
-    print(f"✓ Created {len(all_chunks)} chunks from {len(documents)} documents")
+    Returns:
+        List of chunks in the format of chunk_documents
+    """
+    window_size, stride = _resolve_window(window_size, stride, chunk_size, chunk_overlap)
+    windows = _window_function(window_size, stride, mode)
+    texts = [page.get("text", "") for page in pages]
+    metadatas = [_metadata(page) for page in pages]
+    
+    full_text = PAGE_SEPARATOR.join(texts)
+    
+    # Offset of the separator preceding each page, so a window starting on
+    # a page break is credited to the page that follows it. Window starts
+    # are relative to the stripped text, so shift the offsets to match.
+    sep = len(PAGE_SEPARATOR)
+    lead = len(full_text) - len(full_text.lstrip())
+    page_offsets = list(accumulate((len(text) + sep for text in texts[:-1]), initial=-sep - lead))
+    
+    # Window starts only increase, so the page changes only when a start
+    # crosses the next page's offset; bisect just at those points
+    page_ends = page_offsets[1:] + [float("inf")]
+    metadata = metadatas[0] if metadatas else {}
+    next_page = page_ends[0]
     
-    return all_chunks
+    chunks = []
+    append = chunks.append
+    for chunk_index, (start, piece) in enumerate(windows(full_text.strip())):
+        if start >= next_page:
+            page = bisect_right(page_offsets, start) - 1
+            metadata = metadatas[page]
+            next_page = page_ends[page]
+        append({"text": piece, "chunk_index": chunk_index, **metadata})
+    
+    logger.debug("✓ Created %d chunks from %d pages", len(chunks), len(pages))
+    
+    return chunks
@@ -0,0 +1,52 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Document Utilities - Chunker Extension
+Compiled fixed-window chunking loop (optional; utils.chunker falls back to Python)
+"""
+
+cdef extern from "Python.h":
+    str PyUnicode_Substring(str text, Py_ssize_t start, Py_ssize_t end)
+
+
+cpdef list char_windows(str text, Py_ssize_t window_size, Py_ssize_t stride):
+    """
+    Fixed character windows over normalized text
+
+    Same output as the generated Python chunker in utils.chunker: full
+    windows every stride characters plus a final partial window reaching
+    the end, with all-whitespace windows skipped. Starts run below
+    max(len(text) - (window_size - stride), 1), which yields exactly those
+    windows.
+
+    Args:
+        text: Stripped text to chunk
+        window_size: Maximum characters per chunk
+        stride: Characters between consecutive chunk starts
+
+    Returns:
+        List of (start offset, chunk text) tuples
+    """
+    cdef Py_ssize_t n = len(text)
+    cdef Py_ssize_t stop = n - (window_size - stride)
+    cdef Py_ssize_t start = 0
+    cdef Py_ssize_t end
+    cdef str piece
+    cdef list windows = []
+
+    if stride <= 0 or stride > window_size:
+        raise ValueError("stride must be between 1 and window_size")
+    if n == 0:
+        return windows
+    if stop < 1:
+        stop = 1
+
+    while start < stop:
+        end = start + window_size
+        if end > n:
+            end = n
+        piece = PyUnicode_Substring(text, start, end)
+        if not piece.isspace():
+            windows.append((start, piece))
+        start += stride
+
+    return windows
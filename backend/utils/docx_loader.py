@@ -3,17 +3,75 @@ Document Utilities - DOCX Loader
 Extracts text from Word documents with paragraph tracking
 """
 
-from typing import List, Dict
-from docx import Document
-from io import BytesIO
+import logging
+import zipfile
+from typing import List, Dict, Any, Iterator
+from lxml import etree
+from utils.file_io import FileSource, as_stream
+from utils.chunker import chunk_documents, DEFAULT_WINDOW_SIZE, DEFAULT_STRIDE
 
 
-def load_docx(file_content: bytes, filename: str) -> List[Dict[str, any]]:
+logger = logging.getLogger(__name__)
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# Run content that contributes to paragraph text, matching python-docx's
+# Paragraph.text: runs directly in the paragraph or inside hyperlinks
+_RUN_TEXT = etree.XPath(
+    "(w:r | w:hyperlink/w:r)/*[self::w:t or self::w:tab or self::w:br or self::w:cr"
+    " or self::w:noBreakHyphen or self::w:ptab]",
+    namespaces={"w": W_NS[1:-1]}
+)
+_T = W_NS + "t"
+_BR = W_NS + "br"
+_BR_TYPE = W_NS + "type"
+_SYMBOL_TEXT = {
+    W_NS + "tab": "\t",
+    W_NS + "cr": "\n",
+    W_NS + "noBreakHyphen": "-",
+    W_NS + "ptab": "\t"
+}
+
+
+def _node_text(node: Any) -> str:
+    """Text equivalent of one run element (python-docx's str() of it)"""
+    tag = node.tag
+    if tag == _T:
+        return node.text or ""
+    if tag == _BR:
+        # Only line breaks are text; page and column breaks are dropped
+        return "\n" if node.get(_BR_TYPE, "textWrapping") == "textWrapping" else ""
+    return _SYMBOL_TEXT[tag]
+
+
+def _iter_paragraphs(file_content: FileSource, filename: str) -> Iterator[Dict[str, Any]]:
+    """Yield paragraph dicts (see load_docx) one at a time"""
+    # Read the main document part straight out of the DOCX archive
+    with zipfile.ZipFile(as_stream(file_content)) as archive:
+        root = etree.fromstring(archive.read("word/document.xml"))
+    
+    # Top-level body paragraphs (the same set as python-docx's doc.paragraphs)
+    body = root.find(W_NS + "body")
+    body_paragraphs = body.iterchildren(W_NS + "p") if body is not None else ()
+    
+    for para_idx, paragraph in enumerate(body_paragraphs, start=1):
+        text = "".join(_node_text(node) for node in _RUN_TEXT(paragraph))
+        
+        # Only include paragraphs with actual text content
+        if text and text.strip():
+            yield {
+                "text": text.strip(),
+                "paragraph_index": para_idx,
+                "document_name": filename
+            }
+
+
+def load_docx(file_content: FileSource, filename: str) -> List[Dict[str, any]]:
     """
     Extract text from DOCX file with paragraph-level metadata
     
     Args:
-        file_content: DOCX file content as bytes
+        file_content: DOCX file content as bytes or a binary file object
         filename: Original filename
     
     Returns:
@@ -24,29 +82,50 @@ def load_docx(file_content: bytes, filename: str) -> List[Dict[str, any]]:
             "document_name": str
         }
     """
-    paragraphs = []
-    
     try:
-        # Create Document from bytes
-        docx_file = BytesIO(file_content)
-        doc = Document(docx_file)
-        
-        # Extract text from each paragraph
-        for para_idx, paragraph in enumerate(doc.paragraphs, start=1):
-            text = paragraph.text
-            
-            # Only include paragraphs with actual text content
-            if text and text.strip():
-                paragraphs.append({
-                    "text": text.strip(),
-                    "paragraph_index": para_idx,
-                    "document_name": filename
-                })
-        
-        print(f"✓ Extracted {len(paragraphs)} paragraphs from {filename}")
+        paragraphs = list(_iter_paragraphs(file_content, filename))
+        logger.debug("✓ Extracted %d paragraphs from %s", len(paragraphs), filename)
         
     except Exception as e:
-        print(f"✗ Error loading DOCX {filename}: {str(e)}")
+        logger.error("✗ Error loading DOCX %s: %s", filename, e)
         raise
     
     return paragraphs
+
+
+def load_and_chunk_docx(
+    file_content: FileSource,
+    filename: str,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    stride: int = DEFAULT_STRIDE,
+    mode: str = "chars"
+) -> Iterator[Dict[str, Any]]:
+    """
+    Extract and chunk a DOCX file in one pass
+    
+    Paragraphs are streamed from the parsed XML tree into
+    utils.chunker.chunk_documents, so each is chunked as soon as it is
+    extracted and the paragraph list is never materialized alongside the
+    chunks.
+    
+    Args:
+        file_content: DOCX file content as bytes or a binary file object
+        filename: Original filename
+        window_size: Maximum characters per chunk
+        stride: Characters between consecutive chunk starts
+        mode: "chars" or "sentences" (see utils.chunker.chunk_text)
+    
+    Yields:
+        Chunks in the format of utils.chunker.chunk_documents
+    """
+    try:
+        yield from chunk_documents(
+            _iter_paragraphs(file_content, filename),
+            window_size=window_size,
+            stride=stride,
+            mode=mode
+        )
+        
+    except Exception as e:
+        logger.error("✗ Error loading DOCX %s: %s", filename, e)
+        raise
@@ -0,0 +1,33 @@
+"""
+Document Utilities - File IO
+Shared handling of uploaded file content for the document loaders
+"""
+
+from typing import Union, BinaryIO
+from io import BytesIO
+
+
+# Raw bytes, or a file object such as an upload's spooled temp file
+FileSource = Union[bytes, BinaryIO]
+
+
+def as_stream(file_content: FileSource) -> BinaryIO:
+    """
+    Wrap bytes in a stream; rewind file objects so they can be read in place
+    
+    BytesIO shares an immutable bytes buffer until written to, so wrapping
+    bytes does not copy them; bytearray and memoryview content is copied.
+    File objects are returned as they are, so a loader called directly on
+    one parses it in place. The ingest pipeline always hands its loader
+    workers bytes, since open files cannot be sent to another process.
+    
+    Args:
+        file_content: File content as bytes or a binary file object
+    
+    Returns:
+        Seekable binary stream positioned at the start
+    """
+    if isinstance(file_content, (bytes, bytearray, memoryview)):
+        return BytesIO(file_content)
+    file_content.seek(0)
+    return file_content
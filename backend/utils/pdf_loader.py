@@ -3,18 +3,120 @@ Document Utilities - PDF Loader
 Extracts text from PDF files with page number tracking
 """
 
-from typing import List, Dict
-import PyPDF2
+import os
+import logging
 from io import BytesIO
+from concurrent.futures import Executor
+from itertools import repeat
+from typing import List, Dict, Optional, Any, BinaryIO
+import PyPDF2
+from utils.file_io import FileSource, as_stream
+from utils.chunker import chunk_pages, DEFAULT_WINDOW_SIZE, DEFAULT_STRIDE
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # PyPDF2 remains available as the fallback backend
+    pdfium = None
+
+
+logger = logging.getLogger(__name__)
+
+# Below this many pages, extract serially to skip pool start-up
+PARALLEL_PAGE_THRESHOLD = 8
+
+# "pdfium" (PDFium C++ bindings, much faster) or "pypdf2" (pure Python)
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pdfium").lower()
+if PDF_BACKEND == "pdfium" and pdfium is None:
+    logger.warning("⚠ PDF_BACKEND=pdfium but pypdfium2 is not installed; using PyPDF2")
+    PDF_BACKEND = "pypdf2"
+
+
+def _open_document(source: Any) -> Any:
+    """Open a PDF stream with the configured backend"""
+    if PDF_BACKEND == "pdfium":
+        return pdfium.PdfDocument(source)
+    return PyPDF2.PdfReader(source)
+
 
+def _close_document(document: Any) -> None:
+    """Release native resources held by a pdfium document"""
+    if PDF_BACKEND == "pdfium":
+        document.close()
 
-def load_pdf(file_content: bytes, filename: str) -> List[Dict[str, any]]:
+
+def _page_count(document: Any) -> int:
+    if PDF_BACKEND == "pdfium":
+        return len(document)
+    return len(document.pages)
+
+
+def _page_texts(document: Any, start: int, stop: int) -> List[str]:
+    """Extract text for pages [start, stop) of an open document"""
+    if PDF_BACKEND == "pdfium":
+        texts = []
+        for i in range(start, stop):
+            page = document[i]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return texts
+    return [document.pages[i].extract_text() for i in range(start, stop)]
+
+
+def _extract_page_texts(pdf_bytes: bytes, start: int, stop: int) -> List[str]:
+    """
+    Extract text for pages [start, stop) in a worker process
+    
+    Page objects don't pickle, so each worker reopens the document
+    from the raw bytes and handles a contiguous span of pages.
+    """
+    document = _open_document(BytesIO(pdf_bytes))
+    try:
+        return _page_texts(document, start, stop)
+    finally:
+        _close_document(document)
+
+
+def _extract_texts(
+    document: Any,
+    pdf_file: BinaryIO,
+    executor: Optional[Executor]
+) -> List[str]:
+    """Extract every page's text, spreading large PDFs across the executor"""
+    n_pages = _page_count(document)
+    
+    if executor is None or n_pages < PARALLEL_PAGE_THRESHOLD:
+        return _page_texts(document, 0, n_pages)
+    
+    # Workers need the raw bytes; reading a whole stream over bytes returns
+    # the shared buffer rather than a copy
+    pdf_file.seek(0)
+    pdf_bytes = pdf_file.read()
+    
+    # One contiguous span per CPU so each task reopens the PDF only once
+    span = -(-n_pages // min(os.cpu_count() or 1, n_pages))
+    starts = range(0, n_pages, span)
+    stops = [min(start + span, n_pages) for start in starts]
+    
+    spans = executor.map(_extract_page_texts, repeat(pdf_bytes), starts, stops)
+    return [text for texts in spans for text in texts]
+
+
+def load_pdf(
+    file_content: FileSource,
+    filename: str,
+    executor: Optional[Executor] = None
+) -> List[Dict[str, any]]:
     """
     Extract text from PDF file with page-level metadata
     
     Args:
-        file_content: PDF file content as bytes
+        file_content: PDF file content as bytes or a binary file object
         filename: Original filename
+        executor: Process pool to spread page extraction over (pages are
+            extracted serially if omitted; pdfium is not thread-safe, so
+            this must not be a thread pool)
     
     Returns:
         List of dicts with structure:
@@ -27,14 +129,16 @@ def load_pdf(file_content: bytes, filename: str) -> List[Dict[str, any]]:
     pages = []
     
     try:
-        # Create PDF reader from bytes
-        pdf_file = BytesIO(file_content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        # Parse from a stream over the content (see as_stream for when
+        # that avoids a copy)
+        pdf_file = as_stream(file_content)
+        document = _open_document(pdf_file)
+        try:
+            texts = _extract_texts(document, pdf_file, executor)
+        finally:
+            _close_document(document)
         
-        # Extract text from each page
-        for page_num, page in enumerate(pdf_reader.pages, start=1):
-            text = page.extract_text()
-            
+        for page_num, text in enumerate(texts, start=1):
             # Only include pages with actual text content
             if text and text.strip():
                 pages.append({
@@ -43,10 +147,45 @@ def load_pdf(file_content: bytes, filename: str) -> List[Dict[str, any]]:
                     "document_name": filename
                 })
         
-        print(f"✓ Extracted {len(pages)} pages from {filename}")
+        logger.debug("✓ Extracted %d pages from %s", len(pages), filename)
         
     except Exception as e:
-        print(f"✗ Error loading PDF {filename}: {str(e)}")
+        logger.error("✗ Error loading PDF %s: %s", filename, e)
         raise
     
     return pages
+
+
+def load_and_chunk_pdf(
+    file_content: FileSource,
+    filename: str,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    stride: int = DEFAULT_STRIDE,
+    mode: str = "chars",
+    executor: Optional[Executor] = None
+) -> List[Dict[str, Any]]:
+    """
+    Extract and chunk a PDF file
+    
+    Every page is extracted first; the page list is then joined and
+    chunked in a single pass (see utils.chunker.chunk_pages), so chunks
+    can span page breaks. Pages are not streamed into the chunker one at
+    a time.
+    
+    Args:
+        file_content: PDF file content as bytes or a binary file object
+        filename: Original filename
+        window_size: Maximum characters per chunk
+        stride: Characters between consecutive chunk starts
+        mode: "chars" or "sentences" (see utils.chunker.chunk_text)
+        executor: Process pool for page extraction (see load_pdf)
+    
+    Returns:
+        List of chunks in the format of utils.chunker.chunk_documents
+    """
+    return chunk_pages(
+        load_pdf(file_content, filename, executor),
+        window_size=window_size,
+        stride=stride,
+        mode=mode
+    )